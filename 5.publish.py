@@ -0,0 +1,6 @@
+# The publish step lives in oilupdater/publish.py; this script keeps
+# `python 5.publish.py [options]` working (same as: python -m oilupdater publish).
+from oilupdater.publish import cli
+
+if __name__ == "__main__":
+    cli()
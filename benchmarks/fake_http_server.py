@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import asyncio
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from email.utils import formatdate
+
+# Local stand-in for the hosts the pipeline fetches from, so the PIP link
+# verifier and the scraper's conditional GET can be run against known answers
+# without network:
+#
+#   /ok         200
+#   /redirect   301 -> /ok
+#   /missing    404
+#   /no-head    405 to HEAD, 206 to a range GET (servers that refuse HEAD)
+#   /slow       200 after --slow seconds (longer than the verifier's timeout)
+#   /pricelist.pdf  the fixture PDF with ETag / Last-Modified; 304 when the
+#                   client's If-None-Match or If-Modified-Since still matches
+#
+#   python benchmarks/fake_http_server.py --port 8791       -> serve until Ctrl+C
+#   python benchmarks/fake_http_server.py --check           -> run pip_verifier and fetch_pdf against it
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOST = "127.0.0.1"
+PORT = 8791
+SLOW_SECONDS = 2.0
+PDF_FILE = os.path.join(ROOT, "benchmarks", "fixtures", "sample_price_list.pdf")
+
+# path -> status the verifier should report
+LINK_CASES = {
+    "/ok": "ok",
+    "/redirect": "redirect",
+    "/missing": "broken",
+    "/no-head": "ok",
+    "/slow": "timeout",
+}
+
+
+def make_handler(server_state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def reply(self, status, body=b"", headers=()):
+            with server_state["lock"]:
+                server_state["requests"].append((self.command, self.path, status))
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def route(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/ok":
+                self.reply(200, b"ok", (("Content-Type", "text/plain"),))
+            elif path == "/redirect":
+                self.reply(301, headers=(("Location", "/ok"),))
+            elif path == "/no-head":
+                if self.command == "HEAD":
+                    self.reply(405, headers=(("Allow", "GET"),))
+                elif self.headers.get("Range"):
+                    self.reply(206, b"o", (("Content-Range", "bytes 0-0/2"),))
+                else:
+                    self.reply(200, b"ok")
+            elif path == "/slow":
+                time.sleep(server_state["slow"])
+                self.reply(200, b"ok")
+            elif path == "/pricelist.pdf":
+                self.reply_pdf()
+            else:
+                self.reply(404, b"not found")
+
+        def reply_pdf(self):
+            with server_state["lock"]:
+                body, etag, modified = server_state["pdf"], server_state["etag"], server_state["modified"]
+            validators = (("ETag", etag), ("Last-Modified", modified))
+            if_none_match = self.headers.get("If-None-Match")
+            if (if_none_match == etag if if_none_match is not None
+                    else self.headers.get("If-Modified-Since") == modified):
+                self.reply(304, headers=validators)
+            else:
+                self.reply(200, body, (("Content-Type", "application/pdf"),) + validators)
+
+        do_GET = route
+        do_HEAD = route
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, slow=SLOW_SECONDS, pdf_path=PDF_FILE):
+        self.state = {"lock": threading.Lock(), "requests": [], "slow": slow}
+        with open(pdf_path, "rb") as f:
+            self.set_pdf(f.read())
+        super().__init__(address, make_handler(self.state))
+
+    def set_pdf(self, data):
+        """Publishes a new price list: new body, new validators."""
+        with self.state["lock"]:
+            self.state.update(pdf=data, etag='"' + hashlib.sha256(data).hexdigest()[:16] + '"',
+                              modified=formatdate(time.time(), usegmt=True))
+
+
+def start(host=HOST, port=0, slow=SLOW_SECONDS):
+    """Runs the server in a background thread; returns (server, base_url). port=0 picks a free port."""
+    server = Server((host, port), slow)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ---------- CHECKS ----------
+
+def check_verifier(base_url, timeout):
+    import pip_verifier
+
+    urls = [base_url + path for path in LINK_CASES]
+    results = asyncio.run(pip_verifier.check_urls(urls, timeout=timeout, retries=0))
+    failures = 0
+    for path, expected in LINK_CASES.items():
+        result = results[base_url + path]
+        ok = result["status"] == expected
+        failures += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} pip_verifier {path:12} -> {result['status']} (expected {expected})")
+    return failures
+
+
+def check_conditional_get(server, base_url):
+    from oilupdater import scrape
+
+    url = base_url + "/pricelist.pdf"
+    failures = 0
+
+    def expect(name, ok):
+        nonlocal failures
+        failures += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} fetch_pdf {name}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path, meta = scrape.fetch_pdf(url, cache_dir)
+        with open(path, "rb") as f:
+            expect("first run downloads the PDF (200)",
+                   server.state["requests"][-1][2] == 200 and f.read() == server.state["pdf"])
+        expect("validators are kept", meta.get("etag") == server.state["etag"] and bool(meta.get("last_modified")))
+
+        path, again = scrape.fetch_pdf(url, cache_dir)
+        expect("second run is answered 304 and reuses the cached copy",
+               server.state["requests"][-1][2] == 304 and again["sha256"] == meta["sha256"] and os.path.exists(path))
+
+        server.set_pdf(server.state["pdf"] + b"\n% new edition\n")
+        path, changed = scrape.fetch_pdf(url, cache_dir)
+        with open(path, "rb") as f:
+            expect("a new edition is downloaded again", server.state["requests"][-1][2] == 200
+                   and f.read() == server.state["pdf"]
+                   and changed["sha256"] != meta["sha256"] and changed["etag"] == server.state["etag"])
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in server for the PIP link verifier and the PDF download")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--slow", type=float, default=SLOW_SECONDS, help="seconds before /slow answers")
+    parser.add_argument("--check", action="store_true",
+                        help="run the verifier and fetch_pdf against a server on a free port")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.path.insert(0, ROOT)
+        server, base_url = start(args.host, 0, args.slow)
+        print(f"Checking against {base_url}")
+        failures = check_verifier(base_url, timeout=args.slow / 4)
+        failures += check_conditional_get(server, base_url)
+        server.shutdown()
+        print("All checks passed." if not failures else f"{failures} check(s) failed.")
+        sys.exit(1 if failures else 0)
+
+    server = Server((args.host, args.port), args.slow)
+    print(f"Fake HTTP server on http://{args.host}:{args.port}: " + ", ".join(list(LINK_CASES) + ["/pricelist.pdf"]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
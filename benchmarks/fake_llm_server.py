@@ -0,0 +1,185 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local stand-in for the DeepSeek (OpenAI-compatible) chat completions API.
+# It answers the enrichment prompts of 2.deepseek_enrich.py (single, keyed
+# batch and field repair) with schema-valid, deterministic entries, after a
+# configurable latency, and fails a configurable share of requests with
+# 429 / 503 so the retry paths get exercised too.
+#
+#   python benchmarks/fake_llm_server.py --port 8790 --latency 800 --error-rate 0.02
+#   -> point BASE_URL at http://127.0.0.1:8790
+
+HOST = "127.0.0.1"
+PORT = 8790
+LATENCY_MS = 50       # fixed part of every answer
+MS_PER_TOKEN = 0.0    # plus this per completion token (real models stream ~20-60 ms/token)
+JITTER = 0.2          # +- share of the latency, uniform
+ERROR_RATE = 0.0
+
+BENEFITS = ("sleep", "stress", "mood", "pain", "skin", "digestive", "energy", "respiratory", "immune", "focus")
+DOMAINS = ("nervous_system", "cardiovascular", "endocrine", "skin_barrier", "digestive", "respiratory", "immune")
+
+
+def llm_fields(item):
+    """The model-written part of an entry, stable per product."""
+    seed = int(hashlib.sha256(str(item.get("itemNo")).encode("utf-8")).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    name = item.get("name") or "Product"
+    return {
+        "usage": {
+            "aromatic": {"allowed": True, "intent": "primary", "notes": "Diffuse 3-4 drops."},
+            "topical": {"allowed": True, "intent": "secondary", "dilutionGuidance": "Dilute with a carrier oil.",
+                        "notes": None},
+            "internal": {"allowed": rng.random() < 0.5, "intent": "supportive", "notes": None},
+        },
+        "generalBenefits": {
+            b: {"score": rng.randint(1, 5), "summary": f"{name}: {b} support (benchmark answer)."} for b in BENEFITS
+        },
+        "atomicEffects": [
+            {"mechanism": f"Mechanism {i + 1}", "domain": rng.choice(DOMAINS), "description": "Benchmark effect."}
+            for i in range(rng.randint(2, 4))
+        ],
+        "primaryCompounds": rng.sample(["Linalool", "Limonene", "Alpha-pinene", "Menthol", "Eugenol"], 2),
+        "evidence": {"level": rng.choice(("low", "moderate", "strong")), "verifiedSource": "PIP"},
+        "references": {"productPage": None, "PIP": None},
+    }
+
+
+def answer(messages):
+    """Completion text for an enrichment request."""
+    prompt = messages[-1]["content"]
+    data = json.loads(prompt.rsplit("INPUT:\n", 1)[1])
+    if "Repair mode" in prompt:
+        keys = prompt.split("ONLY these keys: ", 1)[1].split(". ", 1)[0].split(", ")
+        fields = llm_fields(data)
+        return {k: fields[k] for k in keys if k in fields}
+    if isinstance(data, list):
+        return {item.get("itemNo"): llm_fields(item) for item in data}
+    return llm_fields(data)
+
+
+class FakeLLM:
+    def __init__(self, latency_ms=LATENCY_MS, ms_per_token=MS_PER_TOKEN, jitter=JITTER,
+                 error_rate=ERROR_RATE, seed=0):
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def delay(self, completion_tokens):
+        base = self.latency_ms + self.ms_per_token * completion_tokens
+        with self.lock:
+            factor = 1 + self.rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, base * factor) / 1000
+
+    def fails(self):
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def send_json(self, status, data, headers=()):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": "only /chat/completions is implemented"}})
+                return
+
+            with fake.lock:
+                fake.stats["requests"] += 1
+                fake.stats["in_flight"] += 1
+                fake.stats["max_in_flight"] = max(fake.stats["max_in_flight"], fake.stats["in_flight"])
+            try:
+                request = json.loads(body)
+                content = json.dumps(answer(request["messages"]), ensure_ascii=False)
+                prompt_tokens = sum(len(m["content"]) for m in request["messages"]) // 4
+                completion_tokens = len(content) // 4
+                time.sleep(fake.delay(completion_tokens))
+
+                if fake.fails():
+                    with fake.lock:
+                        fake.stats["errors"] += 1
+                    status = fake.rng.choice((429, 503))
+                    self.send_json(status, {"error": {"message": "injected failure", "code": status}},
+                                   headers=(("Retry-After", "0"),) if status == 429 else ())
+                    return
+
+                self.send_json(200, {
+                    "id": "bench-" + hashlib.sha1(body).hexdigest()[:12],
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+            except (ValueError, KeyError, IndexError) as e:
+                self.send_json(400, {"error": {"message": f"not an enrichment request: {e}"}})
+            finally:
+                with fake.lock:
+                    fake.stats["in_flight"] -= 1
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog (5) drops connections at high concurrency
+
+
+def start(fake=None, host=HOST, port=0):
+    """Runs the server in a background thread; returns (server, base_url). port=0 picks a free port."""
+    fake = fake or FakeLLM()
+    server = Server((host, port), make_handler(fake))
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server for enrichment benchmarks")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--latency", type=float, default=LATENCY_MS, help="ms per answer")
+    parser.add_argument("--ms-per-token", type=float, default=MS_PER_TOKEN, help="extra ms per completion token")
+    parser.add_argument("--jitter", type=float, default=JITTER)
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE, help="share of requests failed with 429/503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.latency, args.ms_per_token, args.jitter, args.error_rate, args.seed)
+    server = Server((args.host, args.port), make_handler(fake))
+    print(f"Fake LLM on http://{args.host}:{args.port} (latency {args.latency} ms, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(fake.stats))
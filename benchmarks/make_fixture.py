@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+import zlib
+import argparse
+
+# Renders the page texts of fixtures/price_list_text.json into a small PDF laid
+# out like the price list, so the scraper can be benchmarked end to end without
+# the live brochure. Those texts are synthesized from doterra_products.json in
+# the price-list line format, not captured from the real PDF. Latin text uses
+# the base-14 Helvetica font, Chinese the predefined Adobe-CNS1 CJK font (nothing
+# embedded): pdfplumber's extract_text() gives back the synthesized lines.
+#
+#   python benchmarks/make_fixture.py   (needs pdfplumber, only to verify the result)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(HERE, "fixtures", "price_list_text.json")
+PDF_FILE = os.path.join(HERE, "fixtures", "sample_price_list.pdf")
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 36
+FONT_SIZE = 8
+LEADING = 12     # baseline to baseline
+WORD_GAP = 6     # > pdfplumber's x_tolerance (3), so every gap reads as one space
+OMACRON = 129    # spare WinAnsi code mapped to "ō" (dōTERRA) through /Differences
+
+
+def is_cjk(ch):
+    return ord(ch) >= 0x2E80
+
+
+def helvetica_widths():
+    """WinAnsi code -> glyph width (1/1000 em), from pdfminer's copy of the Helvetica AFM."""
+    from pdfminer.fontmetrics import FONT_METRICS
+    metrics = FONT_METRICS["Helvetica"][1]
+    widths = {}
+    for code in range(32, 256):
+        try:
+            ch = bytes([code]).decode("cp1252")
+        except UnicodeDecodeError:
+            continue
+        if ch in metrics:
+            widths[code] = metrics[ch]
+    widths[OMACRON] = metrics["o"]
+    return widths
+
+
+def encode_latin(text):
+    return bytes(OMACRON if ch == "ō" else ch.encode("cp1252")[0] for ch in text)
+
+
+def pdf_string(data):
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def runs(token):
+    """Splits a token into (is_cjk, text) runs."""
+    result = []
+    for ch in token:
+        if result and result[-1][0] == is_cjk(ch):
+            result[-1][1] += ch
+        else:
+            result.append([is_cjk(ch), ch])
+    return result
+
+
+def page_stream(lines, widths):
+    ops = [b"BT"]
+    y = PAGE_HEIGHT - MARGIN
+    for line in lines:
+        x = MARGIN
+        for token in line.split(" "):
+            if not token:
+                continue
+            for cjk, text in runs(token):
+                if cjk:
+                    data = b"<" + text.encode("utf-16-be").hex().encode("ascii") + b">"
+                    ops.append(b"/F2 %d Tf 1 0 0 1 %.2f %.2f Tm %s Tj" % (FONT_SIZE, x, y, data))
+                    x += FONT_SIZE * len(text)  # default CID width: 1000
+                else:
+                    data = encode_latin(text)
+                    ops.append(b"/F1 %d Tf 1 0 0 1 %.2f %.2f Tm %s Tj" % (FONT_SIZE, x, y, pdf_string(data)))
+                    x += FONT_SIZE * sum(widths.get(c, 556) for c in data) / 1000
+            x += WORD_GAP
+        y -= LEADING
+    ops.append(b"ET")
+    return b"\n".join(ops)
+
+
+def build_pdf(pages):
+    widths = helvetica_widths()
+    objects = []  # object n is objects[n - 1]
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    first, last = 32, 255
+    width_list = " ".join(str(widths.get(c, 0)) for c in range(first, last + 1)).encode("ascii")
+    latin = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /FirstChar %d /LastChar %d "
+                b"/Widths [%s] /Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding "
+                b"/Differences [%d /omacron] >> >>" % (first, last, width_list, OMACRON))
+    descriptor = add(b"<< /Type /FontDescriptor /FontName /MSung-Light /Flags 6 /FontBBox [-160 -259 1015 888] "
+                     b"/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 880 /StemV 93 >>")
+    cid_font = add(b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /MSung-Light "
+                   b"/CIDSystemInfo << /Registry (Adobe) /Ordering (CNS1) /Supplement 4 >> "
+                   b"/FontDescriptor %d 0 R /DW 1000 >>" % descriptor)
+    cjk = add(b"<< /Type /Font /Subtype /Type0 /BaseFont /MSung-Light-UniCNS-UCS2-H "
+              b"/Encoding /UniCNS-UCS2-H /DescendantFonts [%d 0 R] >>" % cid_font)
+
+    pages_id = len(objects) + 1
+    add(None)  # placeholder for the page tree
+    kids = []
+    for text in pages:
+        lines = [line for line in (text or "").split("\n") if line.strip()]
+        content = zlib.compress(page_stream(lines, widths), 9)
+        stream = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+                        b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> >>"
+                        % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, stream, latin, cjk)))
+    objects[pages_id - 1] = (b"<< /Type /Pages /Count %d /Kids [%s] >>"
+                             % (len(kids), b" ".join(b"%d 0 R" % k for k in kids)))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for n, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (n, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def verify(pdf_path, pages):
+    """The scraper's products from the PDF must equal the ones from the synthesized text."""
+    sys.path.insert(0, os.path.dirname(HERE))
+    import pdfplumber
+    from oilupdater.row_classifier import scan_text
+    with pdfplumber.open(pdf_path) as pdf:
+        extracted = [page.extract_text() for page in pdf.pages]
+    expected = [event for text in pages for event in scan_text(text or "")]
+    got = [event for text in extracted for event in scan_text(text or "")]
+    return got == expected, sum(1 for kind, _ in got if kind == "product")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sample price-list PDF for the benchmarks")
+    parser.add_argument("--corpus", default=CORPUS_FILE)
+    parser.add_argument("--out", default=PDF_FILE)
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        pages = json.load(f)
+    data = build_pdf(pages)
+    with open(args.out, "wb") as f:
+        f.write(data)
+    print(f"{args.out}: {len(pages)} pages, {len(data) / 1024:.1f} KB")
+
+    if not args.no_verify:
+        same, products = verify(args.out, pages)
+        print(f"Verified: {products} products, " + ("same as the synthesized text" if same else "DIFFERENT from the synthesized text"))
+        sys.exit(0 if same else 1)
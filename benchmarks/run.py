@@ -0,0 +1,310 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import importlib
+import contextlib
+import subprocess
+from datetime import datetime, timezone
+
+# End-to-end benchmarks of the pipeline hot paths, reproducible offline:
+#
+#   scrape   sample_price_list.pdf -> products (text and layout engines), lines/second
+#   enrich   products -> encyclopedia against fake_llm_server.py, per concurrency level
+#   merge    PIP.json -> encyclopedia.json (every link changed, and a no-op run)
+#   publish  minified + precompressed artifacts (cold, warm, with shards)
+#
+# Everything runs in a temporary working directory; results are written as JSON.
+#
+#   python benchmarks/run.py
+#   python benchmarks/run.py --compare benchmarks/results/baseline.json --strict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from oilupdater import row_classifier  # noqa: E402  (repo modules are importable once ROOT is on the path)
+from oilupdater.llm_metrics import load as load_metrics  # noqa: E402
+from fake_llm_server import FakeLLM, start as start_fake_llm  # noqa: E402
+
+PDF_FIXTURE = os.path.join(HERE, "fixtures", "sample_price_list.pdf")
+CORPUS_FIXTURE = os.path.join(HERE, "fixtures", "price_list_text.json")
+RESULTS_FILE = os.path.join(HERE, "results", "latest.json")
+
+CONCURRENCY_LEVELS = (1, 4, 16)
+BATCH_SIZES = (1,)
+LATENCY_MS = 50
+REPEAT = 3          # best-of for the local (non-LLM) stages
+TOLERANCE = 0.15    # --compare: changes beyond this share count as regressions
+
+# Metric name suffix -> True if higher is better
+DIRECTIONS = {"_per_s": True, "_per_min": True, "_ms": False, "_seconds": False}
+
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def best_of(fn, repeat=REPEAT, setup=None):
+    """Fastest of `repeat` runs in seconds (setup() runs untimed before each)."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        with quiet():
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def stage(name):
+    return importlib.import_module("oilupdater." + name)
+
+# ---------- STAGES ----------
+
+def bench_scrape(work, repeat):
+    scraper = stage("scrape")
+    with open(PDF_FIXTURE, "rb") as f:
+        pdf_bytes = f.read()
+    lines = row_classifier.load_corpus(CORPUS_FIXTURE)
+    line_count = sum(1 for line in lines if line.strip())
+
+    results = {"pdf_bytes": len(pdf_bytes), "lines": line_count}
+    for engine in scraper.ENGINES:
+        seconds = best_of(lambda: scraper.parse_pdf(pdf_bytes, 1, engine), repeat)
+        with quiet():
+            products = scraper.parse_pdf(pdf_bytes, 1, engine)
+        results[engine] = {"products": len(products), "parse_seconds": round(seconds, 4),
+                           "lines_per_s": round(line_count / seconds)}
+    # The line classifier alone (no PDF decoding)
+    results["classifier_lines_per_s"] = round(row_classifier.benchmark(lines * 20, repeat))
+
+    # The enrichment input, from the default engine
+    with quiet():
+        products = scraper.parse_pdf(pdf_bytes, 1, scraper.ENGINE)
+    with open(os.path.join(work, "doterra_products.json"), "w", encoding="utf-8") as f:
+        json.dump(products, f, ensure_ascii=False, indent=2)
+    return results
+
+
+def bench_enrich(work, base_url, levels, batch_sizes, rps):
+    with open(os.path.join(work, "deepseek_api_key.txt"), "w") as f:
+        f.write("benchmark")  # read when the clients are built
+    enrich = stage("enrich")
+    enrich.BASE_URL = base_url
+    enrich.client = None  # built by get_client(), as in a real run
+
+    metrics_path = os.path.join(work, "enrich.metrics.jsonl")
+    results = []
+    for batch_size in batch_sizes:
+        for concurrency in levels:
+            for path in ("encyclopedia.json", "PIP.json", "encyclopedia.journal.jsonl"):
+                if os.path.exists(os.path.join(work, path)):
+                    os.remove(os.path.join(work, path))
+            start = time.perf_counter()
+            with quiet():
+                enrich.main(concurrency=concurrency, rate=rps, refresh=True,
+                            cache_dir=os.path.join(work, ".llm_cache"), journal_path="encyclopedia.journal.jsonl",
+                            batch_size=batch_size, quiet=True, metrics_path=metrics_path)
+            seconds = time.perf_counter() - start
+            run = [r for r in load_metrics(metrics_path) if r.get("type") == "run"][-1]
+            results.append({
+                "concurrency": concurrency,
+                "batch_size": batch_size,
+                "products": run["products"],
+                "calls": run["calls"],
+                "errors": run["errors"],
+                "retries": run.get("retries", 0),
+                "failed": run.get("failed", 0),
+                "wall_seconds": round(seconds, 3),
+                "products_per_s": round(run["products"] / seconds, 2),
+                "p50_ms": run["p50_ms"],
+                "p95_ms": run["p95_ms"],
+                "tokens_per_product": run["tokens_per_product"],
+            })
+    return results
+
+
+def bench_merge(work, repeat):
+    generate = stage("generate_pip")
+    merge = stage("merge_pip")
+    encyclopedia = os.path.join(work, "encyclopedia.json")
+    pip_path = os.path.join(work, "PIP.json")
+    with quiet():
+        generate.generate_pip_file()  # PIP.json from the enriched encyclopedia
+    with open(encyclopedia, "rb") as f:
+        original = f.read()
+    with open(pip_path, "r", encoding="utf-8") as f:
+        pip_list = json.load(f)
+    changed_pip = os.path.join(work, "PIP.changed.json")
+    with open(changed_pip, "w", encoding="utf-8") as f:
+        json.dump([{**p, "pip": f"https://example.com/pips/{p['id']}.pdf"} for p in pip_list], f)
+
+    def restore():
+        with open(encyclopedia, "wb") as f:
+            f.write(original)
+
+    patch = os.path.join(work, "PIP.patch.json")
+    changed = best_of(lambda: merge.merge_pip_into_encyclopedia(encyclopedia, changed_pip, encyclopedia, patch),
+                      repeat, setup=restore)
+    noop = best_of(lambda: merge.merge_pip_into_encyclopedia(encyclopedia, changed_pip, encyclopedia, patch), repeat)
+    restore()
+    return {"entries": len(pip_list), "all_changed_seconds": round(changed, 4), "noop_seconds": round(noop, 4),
+            "entries_per_s": round(len(pip_list) / changed)}
+
+
+def bench_publish(work, repeat):
+    publish = stage("publish")
+    products = os.path.join(work, "doterra_products.json")
+    encyclopedia = os.path.join(work, "encyclopedia.json")
+    out_dir = os.path.join(work, "publish")
+
+    def clean():
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    cold = best_of(lambda: publish.publish(products, encyclopedia, out_dir), repeat, setup=clean)
+    warm = best_of(lambda: publish.publish(products, encyclopedia, out_dir), repeat)
+    shards_cold = best_of(lambda: publish.publish(products, encyclopedia, out_dir, shards=True), repeat, setup=clean)
+    shards_warm = best_of(lambda: publish.publish(products, encyclopedia, out_dir, shards=True), repeat)
+    return {"cold_seconds": round(cold, 4), "warm_seconds": round(warm, 4),
+            "shards_cold_seconds": round(shards_cold, 4), "shards_warm_seconds": round(shards_warm, 4),
+            "brotli": publish.brotli is not None}
+
+# ---------- RESULTS ----------
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count()}
+
+
+def flatten(data, prefix=""):
+    """{"a": {"b_ms": 1}, "enrich": [{"concurrency": 4, ...}]} -> {"a.b_ms": 1, "enrich[c4,b1].x": ...}"""
+    flat = {}
+    if isinstance(data, dict):
+        for k, v in data.items():
+            flat.update(flatten(v, f"{prefix}.{k}" if prefix else k))
+    elif isinstance(data, list):
+        for v in data:
+            key = f"{prefix}[c{v.get('concurrency')},b{v.get('batch_size')}]" if isinstance(v, dict) else prefix
+            flat.update(flatten(v, key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix] = data
+    return flat
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """[(metric, old, new, change)] for timed metrics that got worse by more than `tolerance`."""
+    now, before = flatten(current["results"]), flatten(baseline["results"])
+    regressions = []
+    for metric, new in now.items():
+        old = before.get(metric)
+        higher_better = next((d for suffix, d in DIRECTIONS.items() if metric.endswith(suffix)), None)
+        if higher_better is None or not old or new is None:
+            continue
+        change = (new - old) / old
+        if (change < -tolerance) if higher_better else (change > tolerance):
+            regressions.append((metric, old, new, change))
+    return regressions
+
+
+def report(results):
+    print("=" * 60)
+    print("BENCHMARK RESULTS")
+    print("=" * 60)
+    scrape = results["scrape"]
+    for engine in ("text", "layout"):
+        if engine in scrape:
+            r = scrape[engine]
+            print(f"Scrape ({engine + '):':8} {r['lines_per_s']:>9,} lines/s  ({r['products']} products, "
+                  f"{r['parse_seconds'] * 1000:.0f} ms)")
+    print(f"Line classifier:  {scrape['classifier_lines_per_s']:>9,} lines/s")
+    for r in results["enrich"]:
+        print(f"Enrich c={r['concurrency']:<3} b={r['batch_size']:<2} {r['products_per_s']:>8.1f} products/s  "
+              f"(p50 {r['p50_ms']} ms, p95 {r['p95_ms']} ms, {r['calls']} calls, {r['retries']} retries)")
+    merge = results["merge"]
+    print(f"Merge:            {merge['all_changed_seconds'] * 1000:>8.1f} ms all changed, "
+          f"{merge['noop_seconds'] * 1000:.1f} ms no-op")
+    publish = results["publish"]
+    print(f"Publish:          {publish['cold_seconds'] * 1000:>8.1f} ms cold, {publish['warm_seconds'] * 1000:.1f} ms "
+          f"warm ({publish['shards_cold_seconds'] * 1000:.0f} / {publish['shards_warm_seconds'] * 1000:.0f} ms "
+          f"with shards)")
+    print("=" * 60)
+
+
+def run(levels=CONCURRENCY_LEVELS, batch_sizes=BATCH_SIZES, latency_ms=LATENCY_MS, ms_per_token=0.0,
+        error_rate=0.0, rps=1000.0, repeat=REPEAT):
+    fake = FakeLLM(latency_ms, ms_per_token, error_rate=error_rate, seed=0)
+    server, base_url = start_fake_llm(fake)
+    work = tempfile.mkdtemp(prefix="oil-bench-")
+    cwd = os.getcwd()
+    results = {}
+    try:
+        os.chdir(work)  # the stages read and write relative paths
+        results["scrape"] = bench_scrape(work, repeat)
+        results["enrich"] = bench_enrich(work, base_url, levels, batch_sizes, rps)
+        results["merge"] = bench_merge(work, repeat)
+        results["publish"] = bench_publish(work, repeat)
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+
+    return {
+        "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "environment": environment(),
+        "settings": {"concurrency": list(levels), "batch_sizes": list(batch_sizes), "latency_ms": latency_ms,
+                     "ms_per_token": ms_per_token, "error_rate": error_rate, "rps": rps, "repeat": repeat},
+        "fake_llm": dict(fake.stats),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks (sample PDF + fake LLM server)")
+    parser.add_argument("--out", default=RESULTS_FILE, help="JSON results ('' to skip)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(CONCURRENCY_LEVELS))
+    parser.add_argument("--batch-size", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--latency", type=float, default=LATENCY_MS, help="fake LLM ms per answer")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="fake LLM extra ms per output token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake LLM answers failed (429/503)")
+    parser.add_argument("--rps", type=float, default=1000.0, help="enrichment rate limit (high: measure the engine)")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--strict", action="store_true", help="exit 1 when --compare finds a regression")
+    args = parser.parse_args()
+
+    data = run(args.concurrency, args.batch_size, args.latency, args.ms_per_token, args.error_rate, args.rps,
+               args.repeat)
+    report(data["results"])
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"Results: {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(data, baseline, args.tolerance)
+        print(f"Compared with {args.compare} ({baseline['environment'].get('commit')}): "
+              f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        for metric, old, new, change in regressions:
+            print(f"  {metric}: {old} -> {new} ({change:+.0%})")
+        if regressions and args.strict:
+            sys.exit(1)
@@ -0,0 +1,317 @@
+import os
+import re
+import json
+import time
+import bisect
+import hashlib
+import argparse
+import threading
+import unicodedata
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from oilupdater import entry_schema
+from oilupdater.entry_schema import BENEFITS
+
+# Inverted indexes over encyclopedia.json (compound / domain / usage mode /
+# evidence level / category -> itemNos, and score-sorted posting lists per
+# benefit) plus a small local HTTP query service on top. A query intersects
+# posting lists smallest first, so it costs O(result), not O(catalog).
+
+ENCYCLOPEDIA_FILE = "encyclopedia.json"
+INDEX_FILE = "encyclopedia.index.json"
+HOST = "127.0.0.1"
+PORT = 8780
+LIMIT = 50  # default page size of the query service
+
+FIELDS = ("compound", "domain", "usage", "evidence", "category")
+USAGE_MODES = ("aromatic", "topical", "internal")
+GREEK = {"α": "alpha", "β": "beta", "γ": "gamma", "δ": "delta"}
+# Enum fields take the schema's canonical values and aliases ("skin" -> skin_barrier)
+ENUMS = {
+    "domain": entry_schema.Enum(entry_schema.DOMAINS),
+    "usage": entry_schema.Enum(USAGE_MODES),
+    "evidence": entry_schema.Enum(entry_schema.EVIDENCE_LEVELS),
+    "category": entry_schema.Enum(entry_schema.CATEGORIES),
+}
+
+
+def term(text):
+    """Normalized index term: "α-Pinene", "alpha-Pinene", "Alpha pinene" -> "alpha pinene"."""
+    text = "".join(GREEK.get(ch, ch) for ch in str(text))
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r'[\s\-_]+', ' ', text).strip()
+
+
+def normalize(field, value):
+    """Index term of a value of `field`, the same for indexing and querying."""
+    if field in ENUMS:
+        try:
+            value = ENUMS[field](value, field, [])
+        except entry_schema.Invalid:
+            pass
+    return term(value)
+
+
+def compound_terms(name):
+    """The compound itself, plus an alias in brackets: "Melaleuca alternifolia (Tea Tree) oil" -> tea tree."""
+    terms = {term(re.sub(r'\(.*?\)', ' ', name)), term(name)}
+    terms.update(term(alias) for alias in re.findall(r'\((.*?)\)', name))
+    return {t for t in terms if t}
+
+
+def entry_terms(entry):
+    """{field: set of terms} for one entry."""
+    terms = {field: set() for field in FIELDS}
+    for compound in entry.get("primaryCompounds") or []:
+        if isinstance(compound, str):
+            terms["compound"] |= compound_terms(compound)
+    for effect in entry.get("atomicEffects") or []:
+        if isinstance(effect, dict) and effect.get("domain"):
+            terms["domain"].add(normalize("domain", effect["domain"]))
+    usage = entry.get("usage") or {}
+    terms["usage"] = {mode for mode in USAGE_MODES if (usage.get(mode) or {}).get("allowed") is True}
+    for field, value in (("evidence", (entry.get("evidence") or {}).get("level")),
+                         ("category", entry.get("category"))):
+        if value:
+            terms[field].add(normalize(field, value))
+    return terms
+
+
+def build_index(entries, source=None):
+    """JSON-serializable index: compact item rows, postings per field and term, and per
+    benefit a [[itemNo, score], ...] list sorted by score (best first)."""
+    items, postings = {}, {field: {} for field in FIELDS}
+    benefits = {b: [] for b in BENEFITS}
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("itemNo") or entry["itemNo"] in items:
+            continue
+        item_no = entry["itemNo"]
+        prices = entry.get("prices") or {}
+        items[item_no] = {
+            "name": entry.get("name"),
+            "category": entry.get("category"),
+            "member_hkd": prices.get("member_hkd"),
+            "retail_hkd": prices.get("retail_hkd"),
+        }
+        for field, terms in entry_terms(entry).items():
+            for t in terms:
+                postings[field].setdefault(t, []).append(item_no)
+        scores = entry.get("generalBenefits") or {}
+        for b in BENEFITS:
+            score = (scores.get(b) or {}).get("score")
+            if isinstance(score, (int, float)) and not isinstance(score, bool):
+                benefits[b].append([item_no, score])
+
+    for field in postings:
+        postings[field] = {t: sorted(ids) for t, ids in sorted(postings[field].items())}
+    for b in benefits:
+        benefits[b].sort(key=lambda pair: (-pair[1], pair[0]))
+    return {"source": source, "items": items, "postings": postings, "benefits": benefits}
+
+
+class EncyclopediaIndex:
+    def __init__(self, index, entries=None):
+        self.source = index.get("source")
+        self.items = index["items"]
+        self.postings = index["postings"]
+        self.sets = {field: {t: frozenset(ids) for t, ids in terms.items()}
+                     for field, terms in self.postings.items()}
+        self.benefits = index["benefits"]
+        # Negated scores, ascending, so "score >= x" is a bisect away
+        self.benefit_keys = {b: [-score for _, score in pairs] for b, pairs in self.benefits.items()}
+        self.scores = {b: dict(pairs) for b, pairs in self.benefits.items()}
+        self.entries = {e["itemNo"]: e for e in entries or () if isinstance(e, dict) and e.get("itemNo")}
+
+    @classmethod
+    def from_file(cls, path=ENCYCLOPEDIA_FILE):
+        with open(path, "rb") as f:
+            data = f.read()
+        entries = json.loads(data)
+        source = {"file": os.path.basename(path), "sha256": hashlib.sha256(data).hexdigest()}
+        return cls(build_index(entries, source), entries)
+
+    def posting(self, field, values):
+        """Items matching any of `values` (an OR within one parameter)."""
+        if field not in self.sets:
+            raise KeyError(field)
+        sets = [self.sets[field].get(normalize(field, v), frozenset()) for v in values]
+        return sets[0] if len(sets) == 1 else frozenset().union(*sets)
+
+    def with_score(self, benefit, min_score):
+        if benefit not in self.benefits:
+            raise KeyError(benefit)
+        end = bisect.bisect_right(self.benefit_keys[benefit], -min_score)
+        return self.benefits[benefit][:end]
+
+    def query(self, filters=None, benefits=(), min_score=1, limit=LIMIT, offset=0):
+        """filters: {field: [value, ...]}, every value a comma-separated OR of terms,
+        different values and fields ANDed. With benefits, only items scoring >= min_score
+        on all of them, best total score first; otherwise ordered by itemNo.
+        Returns (total matches, [rows])."""
+        sets = [self.posting(field, value.split(","))
+                for field, values in (filters or {}).items() for value in values]
+        sets.sort(key=len)
+        matched = None
+        for s in sets:
+            matched = set(s) if matched is None else matched & s
+            if not matched:
+                return 0, []
+
+        if benefits:
+            # Start from the smaller of the filter result and the shortest score cut,
+            # then only look up the remaining items in the other benefits
+            cuts = sorted((self.with_score(b, min_score) for b in benefits), key=len)
+            if matched is not None and len(matched) < len(cuts[0]):
+                scored = {i: 0 for i in matched}
+            else:
+                scored = {i: 0 for i, _ in cuts[0] if matched is None or i in matched}
+            for b in benefits:
+                scores = self.scores[b]
+                scored = {i: total + scores[i] for i, total in scored.items() if scores.get(i, 0) >= min_score}
+                if not scored:
+                    return 0, []
+            ranked = sorted(scored.items(), key=lambda pair: (-pair[1], pair[0]))
+            page = ranked[offset:offset + limit]
+            return len(ranked), [{"itemNo": i, **self.items[i], "score": s} for i, s in page]
+
+        ids = sorted(matched) if matched is not None else sorted(self.items)
+        return len(ids), [{"itemNo": i, **self.items[i]} for i in ids[offset:offset + limit]]
+
+    def terms(self, field):
+        """[[term, count], ...] most used first."""
+        if field not in self.postings:
+            raise KeyError(field)
+        return sorted(([t, len(ids)] for t, ids in self.postings[field].items()), key=lambda p: (-p[1], p[0]))
+
+# ---------- QUERY SERVICE ----------
+
+class Service:
+    """The index of one encyclopedia file, rebuilt when the file changes."""
+
+    def __init__(self, path=ENCYCLOPEDIA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.index = None
+        self.current()
+
+    def current(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    self.index = EncyclopediaIndex.from_file(self.path)
+                    self._mtime = mtime
+        return self.index
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, status, data):
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            start = time.perf_counter()
+            url = urlsplit(self.path)
+            params = parse_qs(url.query)
+            index = service.current()
+            try:
+                if url.path == "/query":
+                    filters = {f: params[f] for f in FIELDS if f in params}
+                    benefits = [b for value in params.get("benefit", []) for b in value.split(",")]
+                    total, rows = index.query(
+                        filters, benefits,
+                        min_score=float(params.get("min_score", ["1"])[0]),
+                        limit=int(params.get("limit", [LIMIT])[0]),
+                        offset=int(params.get("offset", ["0"])[0]),
+                    )
+                    self.send_json(200, {"count": total, "items": rows,
+                                         "ms": round((time.perf_counter() - start) * 1000, 3)})
+                elif url.path == "/terms":
+                    self.send_json(200, index.terms(params.get("field", ["compound"])[0]))
+                elif url.path.startswith("/item/"):
+                    item_no = unquote(url.path[len("/item/"):])
+                    if item_no in index.entries:
+                        self.send_json(200, index.entries[item_no])
+                    else:
+                        self.send_json(404, {"error": f"unknown itemNo {item_no}"})
+                elif url.path == "/health":
+                    self.send_json(200, {"items": len(index.items), "source": index.source})
+                else:
+                    self.send_json(404, {"error": "try /query, /terms?field=..., /item/<itemNo> or /health"})
+            except KeyError as e:
+                self.send_json(400, {"error": f"unknown field or benefit {e.args[0]!r}",
+                                     "fields": list(FIELDS), "benefits": list(BENEFITS)})
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass  # no access log: the service answers in well under a millisecond per query
+
+    return Handler
+
+
+def serve(path=ENCYCLOPEDIA_FILE, host=HOST, port=PORT):
+    service = Service(path)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serving {len(service.index.items)} items from {path} on http://{host}:{port}")
+    print(f"  e.g. http://{host}:{port}/query?compound=linalool&usage=internal&benefit=sleep&min_score=4")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inverted indexes and a local query service over encyclopedia.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help=f"write the index as JSON ({INDEX_FILE})")
+    build.add_argument("--encyclopedia", default=ENCYCLOPEDIA_FILE)
+    build.add_argument("--out", default=INDEX_FILE)
+
+    query = sub.add_parser("query", help="one query from the command line")
+    query.add_argument("terms", nargs="*", help="field=value[,value] (fields: " + ", ".join(FIELDS) + ")")
+    query.add_argument("--benefit", nargs="*", default=[])
+    query.add_argument("--min-score", type=float, default=1)
+    query.add_argument("--limit", type=int, default=LIMIT)
+    query.add_argument("--encyclopedia", default=ENCYCLOPEDIA_FILE)
+
+    server = sub.add_parser("serve", help="local HTTP query service")
+    server.add_argument("--encyclopedia", default=ENCYCLOPEDIA_FILE)
+    server.add_argument("--host", default=HOST)
+    server.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = EncyclopediaIndex.from_file(args.encyclopedia)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"source": index.source, "items": index.items, "postings": index.postings,
+                       "benefits": index.benefits}, f, ensure_ascii=False, separators=(",", ":"))
+        print(f"{args.out}: {len(index.items)} items, "
+              + ", ".join(f"{len(index.postings[f])} {f} terms" for f in FIELDS))
+    elif args.command == "query":
+        filters = {}
+        for arg in args.terms:
+            field, _, value = arg.partition("=")
+            filters.setdefault(field, []).append(value)
+        index = EncyclopediaIndex.from_file(args.encyclopedia)
+        try:
+            total, rows = index.query(filters, args.benefit, args.min_score, args.limit)
+        except KeyError as e:
+            parser.error(f"unknown field or benefit {e.args[0]!r}")
+        print(f"{total} match(es)")
+        for row in rows:
+            score = f"{row['score']:<4} " if "score" in row else ""
+            print(f"{score}{row['itemNo']}  {row['name']}  [{row['category']}]")
+    else:
+        serve(args.encyclopedia, args.host, args.port)
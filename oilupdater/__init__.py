@@ -0,0 +1,17 @@
+# The pipeline stages as an importable package:
+#
+#   oilupdater.scrape        price-list PDF -> doterra_products.json     (was 1.oil_scraper.py)
+#   oilupdater.enrich        doterra_products.json -> encyclopedia.json  (was 2.deepseek_enrich.py)
+#   oilupdater.merge_pip     PIP.json -> encyclopedia.json               (was 3.merge_PIP.py)
+#   oilupdater.generate_pip  encyclopedia.json -> PIP.json               (was 4.generate_PIP.py)
+#   oilupdater.publish       minified + precompressed website artifacts  (was 5.publish.py)
+#
+# Importing a stage has no side effects: pdfplumber, requests and openai are
+# imported, and the API key read, only when a stage actually needs them.
+# One CLI for all of them: python -m oilupdater <command> [options]
+#
+# The helpers the stages share (ratelimit, llm_cache, journal, entry_schema,
+# backfill, delta_feed, llm_metrics, cassette, row_classifier, layout_extractor,
+# price_history) and the pipeline orchestrator are modules of this package too,
+# imported relatively, so a file of the same name in the current folder can't
+# shadow them. Those with a command line run as python -m oilupdater.<module>.
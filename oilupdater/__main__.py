@@ -0,0 +1,3 @@
+from oilupdater.cli import main
+
+main()
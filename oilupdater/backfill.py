@@ -0,0 +1,160 @@
+import re
+import json
+import argparse
+
+from .entry_schema import CATEGORIES
+from .journal import write_json_array_atomic
+from . import delta_feed
+
+# Local backfill of the encyclopedia fields that come from the price list, not
+# from the model: itemNo, name, size, unit, prices and category (from the
+# type / typeCN section header). The LLM only writes usage, generalBenefits,
+# atomicEffects, primaryCompounds, evidence and references; join_local() lays
+# the scraped fields over each entry, so a price change never needs an API call.
+
+PRODUCTS_FILE = "doterra_products.json"
+ENCYCLOPEDIA_FILE = "encyclopedia.json"
+
+LOCAL_FIELDS = ("itemNo", "name", "size", "unit", "prices", "category")
+LLM_FIELDS = ("usage", "generalBenefits", "atomicEffects", "primaryCompounds", "evidence", "references")
+
+# Price-list section headers (EN or CN) -> encyclopedia category
+CATEGORY_BY_HEADER = {
+    "Single Oils": "Single Oil", "單方精油": "Single Oil",
+    "Proprietary dōTERRA® Essential Oil Blends": "Essential Oil Blends", "專利複方精油": "Essential Oil Blends",
+    "Proprietary dōTERRA® Touch": "Touch", "專利呵護系列": "Touch",
+    "doTERRA Women": "doTERRA Women", "女性呵護": "doTERRA Women",
+    "Personal Care": "Personal Care", "個人護理系列": "Personal Care",
+    "Essential Skin Care": "Personal Care", "基本精油護膚": "Personal Care",
+    "Salon Essentials® Hair Care": "Personal Care", "沙龍級基礎護髮系列": "Personal Care",
+    "doTERRA Sun": "Personal Care", "防曬系列": "Personal Care",
+    "VERÁGE®": "Personal Care",
+    "Foundational Wellness": "Supplements", "基礎健康": "Supplements",
+    "Nutrition": "Supplements", "營養系列": "Supplements",
+    "Specialized Food": "Supplements", "功能保健食品": "Supplements",
+    "Specialized Supplements": "Supplements", "功能保健品": "Supplements",
+}
+
+# Fallback when the header was mis-detected (a product line read as a header)
+CATEGORY_HINTS = (
+    (re.compile(r'softgel|capsule|complex|beadlet|drops|collagen|metapwr|probiome|omega|fiber|粒|pcs', re.I),
+     "Supplements"),
+    (re.compile(r'\btouch\b', re.I), "Touch"),
+    (re.compile(r'lotion|cream|wash|shampoo|conditioner|toothpaste|serum|cleanser|toner|moisturi[sz]er|'
+                r'mist|bath bar|sunscreen|mouthwash|detergent|dispenser', re.I), "Personal Care"),
+)
+
+def header_category(item):
+    return CATEGORY_BY_HEADER.get(item.get("type")) or CATEGORY_BY_HEADER.get(item.get("typeCN"))
+
+def category_for(item, existing=None):
+    """Known section header first, then the category already stored, then name/unit hints."""
+    category = header_category(item)
+    if category:
+        return category
+    if existing in CATEGORIES:
+        return existing
+    text = " ".join(str(item.get(k) or "") for k in ("name", "type", "unit", "unitCN"))
+    for pattern, hinted in CATEGORY_HINTS:
+        if pattern.search(text):
+            return hinted
+    return "Others"
+
+# PDF text artifacts in names: a word hyphenated across a line break ("Anti- Aging")
+HYPHEN_BREAK_RE = re.compile(r'(?<=\w)-\s+(?=\w)')
+
+def clean_name(name):
+    """"Anti- Aging  Eye Cream" -> "Anti-Aging Eye Cream"."""
+    return " ".join(HYPHEN_BREAK_RE.sub("-", name).split())
+
+def name_for(item, existing=None):
+    # A blank scraped name means the name line was taken for a section header
+    if item.get("name"):
+        name = clean_name(item["name"])
+        # Same name apart from spacing: keep the stored spelling
+        if existing and "".join(existing.split()) == "".join(name.split()):
+            return existing
+        return name
+    if existing:
+        return existing
+    return item.get("type") if not header_category(item) else ""
+
+def size_for(item, existing=None):
+    try:
+        size = float(item.get("size"))
+    except (TypeError, ValueError):
+        return existing
+    return int(size) if size.is_integer() else size
+
+def local_fields(item, entry=None):
+    entry = entry or {}
+    return {
+        "itemNo": item.get("itemNo"),
+        "name": name_for(item, entry.get("name")),
+        "size": size_for(item, entry.get("size")),
+        "unit": item.get("unit") or entry.get("unit"),
+        "prices": {"retail_hkd": item.get("retail_hkd"), "member_hkd": item.get("member_hkd")},
+        "category": category_for(item, entry.get("category")),
+    }
+
+def join_local(entry, item):
+    """Lays the scraped fields over `entry` in place (schema key order kept).
+    Returns True if anything changed."""
+    joined = local_fields(item, entry)
+    joined.update((k, v) for k, v in entry.items() if k not in joined)
+    if list(joined.items()) == list(entry.items()):
+        return False
+    entry.clear()
+    entry.update(joined)
+    return True
+
+def llm_part(entry):
+    """Only the fields the model is responsible for."""
+    return {k: entry[k] for k in LLM_FIELDS if k in entry}
+
+def backfill(products_path=PRODUCTS_FILE, encyclopedia_path=ENCYCLOPEDIA_FILE, dry_run=False):
+    with open(products_path, "r", encoding="utf-8") as f:
+        products = json.load(f)
+    with open(encyclopedia_path, "r", encoding="utf-8") as f:
+        encyclopedia = json.load(f)
+
+    items = {}
+    for p in products:
+        items.setdefault(p.get("itemNo"), p)  # first occurrence wins, as in the enrichment
+
+    changed, fields = [], {}
+    for entry in encyclopedia:
+        if not isinstance(entry, dict) or entry.get("itemNo") not in items:
+            continue
+        before = dict(entry)
+        if join_local(entry, items[entry["itemNo"]]):
+            changed.append(entry["itemNo"])
+            for k in LOCAL_FIELDS:
+                if before.get(k) != entry.get(k):
+                    fields[k] = fields.get(k, 0) + 1
+
+    if changed and not dry_run:
+        with delta_feed.track(encyclopedia_path):
+            write_json_array_atomic(encyclopedia_path, encyclopedia)
+
+    print("=" * 50)
+    print("LOCAL BACKFILL")
+    print("=" * 50)
+    print(f"Encyclopedia entries:  {len(encyclopedia)}")
+    print(f"Entries updated:       {len(changed)}")
+    for k, n in fields.items():
+        print(f"  {k + ':':20} {n}")
+    print("Dry run: nothing written." if dry_run else
+          f"Written: {encyclopedia_path}" if changed else f"{encyclopedia_path} already in sync.")
+    print("=" * 50)
+    return changed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync identity, price and category fields of encyclopedia.json "
+                                                 "from doterra_products.json (no API calls)")
+    parser.add_argument("--products", default=PRODUCTS_FILE)
+    parser.add_argument("--encyclopedia", default=ENCYCLOPEDIA_FILE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    backfill(args.products, args.encyclopedia, args.dry_run)
@@ -0,0 +1,107 @@
+import json
+from types import SimpleNamespace
+
+from .llm_cache import content_key
+
+# Record / replay of the enrichment's chat completion calls ("cassette").
+# Record mode passes every request to the API and appends the answer to a JSONL
+# file, keyed by the sha256 of the request; replay mode loads that file once and
+# answers the same requests from memory, without network, API key or rate limit.
+# One line per call: {"key", "kind", "items", "response": {model, content,
+# finish_reason, usage}}; for a key recorded twice the last line wins.
+
+CASSETTE_FILE = "enrich.cassette.jsonl"
+MODES = ("record", "replay")
+
+# Token counts kept from the API's usage block (DeepSeek adds the cache fields)
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens",
+                "prompt_cache_hit_tokens", "prompt_cache_miss_tokens")
+
+
+class CassetteMiss(LookupError):
+    """A replayed request that was never recorded."""
+
+
+def request_key(args):
+    # The timeout is a transport setting, not part of what is asked
+    return content_key({k: v for k, v in args.items() if k != "timeout"})
+
+
+def compact_response(response):
+    """The parts of a chat completion the enrichment reads."""
+    choice = response.choices[0]
+    usage = getattr(response, "usage", None)
+    return {
+        "model": getattr(response, "model", None),
+        "content": choice.message.content,
+        "finish_reason": getattr(choice, "finish_reason", None),
+        "usage": {f: getattr(usage, f) for f in USAGE_FIELDS if getattr(usage, f, None) is not None},
+    }
+
+
+def as_response(data):
+    """A recorded answer shaped like the SDK's ChatCompletion. No usage: a replay costs no tokens."""
+    message = SimpleNamespace(role="assistant", content=data.get("content"))
+    return SimpleNamespace(
+        model=data.get("model"),
+        choices=[SimpleNamespace(index=0, finish_reason=data.get("finish_reason"), message=message)],
+        usage=None,
+    )
+
+
+class Cassette:
+    def __init__(self, path=CASSETTE_FILE, mode="replay"):
+        if mode not in MODES:
+            raise ValueError(f"cassette mode must be one of {', '.join(MODES)}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.replaying = mode == "replay"
+        self.played = 0
+        self.missed = 0
+        self.recorded = 0
+        self.responses = self.load(path) if self.replaying else {}
+        self._file = None
+
+    @staticmethod
+    def load(path):
+        """key -> recorded response, read once."""
+        responses = {}
+        try:
+            f = open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"no cassette at {path} (record one with --record {path})") from None
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted recording
+                responses[record["key"]] = record["response"]
+        return responses
+
+    def play(self, args):
+        data = self.responses.get(request_key(args))
+        if data is None:
+            self.missed += 1
+            raise CassetteMiss(f"request not in {self.path} (record it with --record)")
+        self.played += 1
+        return as_response(data)
+
+    def record(self, args, response, kind=None, items=()):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        record = {"key": request_key(args), "kind": kind,
+                  "items": [item.get("itemNo") for item in items], "response": compact_response(response)}
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.recorded += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self):
+        return len(self.responses)
@@ -0,0 +1,39 @@
+import sys
+import importlib
+
+# python -m oilupdater <command> [options]
+#
+# The command picks a module and hands it the remaining arguments, so only that
+# module (and none of the heavy libraries until they are needed) gets imported.
+
+# command -> (module with cli(argv, prog), help)
+COMMANDS = {
+    "scrape": ("oilupdater.scrape", "price-list PDF -> doterra_products.json"),
+    "enrich": ("oilupdater.enrich", "doterra_products.json -> encyclopedia.json (DeepSeek)"),
+    "pip": ("oilupdater.generate_pip", "encyclopedia.json -> PIP.json"),
+    "merge": ("oilupdater.merge_pip", "merge PIP.json links into encyclopedia.json"),
+    "publish": ("oilupdater.publish", "minified + precompressed artifacts for the website"),
+    "run": ("oilupdater.pipeline", "every stage as a dependency graph, skipping what is up to date"),
+}
+
+PROG = "python -m oilupdater"
+
+
+def usage():
+    lines = [f"usage: {PROG} <command> [options]", "", "commands:"]
+    lines += [f"  {name:9} {help}" for name, (_, help) in COMMANDS.items()]
+    lines += ["", f"{PROG} <command> --help shows the options of a command."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        sys.exit(f"{usage()}\n\n{PROG}: unknown command {command!r}")
+
+    module = importlib.import_module(COMMANDS[command][0])
+    module.cli(rest, prog=f"{PROG} {command}")
@@ -0,0 +1,197 @@
+import os
+import json
+import hashlib
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Versioned delta feed for the pipeline outputs (doterra_products.json,
+# encyclopedia.json, ...). Every run that changes a file appends one delta
+# listing added / removed / modified itemNos; a client that is N versions
+# behind applies the N small deltas instead of refetching the whole file.
+#
+#   deltas/<feed>/feed.json      current version, state hash, list of deltas
+#   deltas/<feed>/v000042.json   one delta document
+#
+# A feed is named after the file it tracks (encyclopedia.json -> "encyclopedia"),
+# so stages that write the same file (enrich, PIP merge) share one version line.
+
+DELTA_DIR = "deltas"
+FEED_FILE = "feed.json"
+KEEP_VERSIONS = 200  # older deltas are pruned; clients further behind refetch the full file
+
+def now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def feed_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def keyed(items, key="itemNo"):
+    """List of entries -> {itemNo: entry}. Duplicate itemNos keep the first entry."""
+    result = {}
+    for item in items or []:
+        if isinstance(item, dict) and item.get(key) is not None:
+            result.setdefault(str(item[key]), item)
+    return result
+
+def state_hash(state):
+    """Order-insensitive hash of an {itemNo: entry} map; clients check it after applying deltas."""
+    data = json.dumps(state, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def diff_items(old_items, new_items, key="itemNo"):
+    """{"added": {itemNo: entry}, "removed": [itemNo], "modified": {itemNo: {"set": {...}, "unset": [...]}}}
+    Modified entries carry only their changed top-level fields."""
+    old, new = keyed(old_items, key), keyed(new_items, key)
+
+    modified = {}
+    for item_id in old.keys() & new.keys():
+        a, b = old[item_id], new[item_id]
+        changes = {}
+        changed = {k: b[k] for k in b if k not in a or a[k] != b[k]}
+        unset = sorted(k for k in a if k not in b)
+        if changed: changes["set"] = changed
+        if unset: changes["unset"] = unset
+        if changes: modified[item_id] = changes
+
+    return {
+        "added": {item_id: new[item_id] for item_id in new if item_id not in old},
+        "removed": sorted(old.keys() - new.keys()),
+        "modified": dict(sorted(modified.items())),
+    }
+
+def apply_delta(state, delta):
+    """Applies one delta to an {itemNo: entry} map in place and returns it."""
+    for item_id in delta["removed"]:
+        state.pop(item_id, None)
+    for item_id, entry in delta["added"].items():
+        state[item_id] = entry
+    for item_id, changes in delta["modified"].items():
+        entry = dict(state[item_id])
+        entry.update(changes.get("set", {}))
+        for k in changes.get("unset", []):
+            entry.pop(k, None)
+        state[item_id] = entry
+    return state
+
+# ---------- FEED FILES ----------
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def delta_file(version):
+    return f"v{version:06d}.json"
+
+def load_feed(name, feed_dir=DELTA_DIR):
+    path = os.path.join(feed_dir, name, FEED_FILE)
+    if not os.path.exists(path):
+        return {"feed": name, "version": 0, "sha256": state_hash({}), "deltas": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def emit_delta(path, old_items, new_items, feed_dir=DELTA_DIR, keep=KEEP_VERSIONS):
+    """Records the change from old_items to new_items as the next version of the
+    feed of `path`. Returns the new version, or None when nothing changed."""
+    delta = diff_items(old_items, new_items)
+    if not (delta["added"] or delta["removed"] or delta["modified"]):
+        return None
+
+    name = feed_name(path)
+    directory = os.path.join(feed_dir, name)
+    os.makedirs(directory, exist_ok=True)
+    feed = load_feed(name, feed_dir)
+    if feed["version"] == 0:
+        # Version 0 is the empty state, so a new feed starts with everything added
+        # (the file may well have existed before the feed did)
+        delta = diff_items([], new_items)
+
+    version = feed["version"] + 1
+    created = now()
+    new_hash = state_hash(keyed(new_items))
+    doc = {
+        "feed": name,
+        "version": version,
+        "base_version": feed["version"],
+        "created": created,
+        "base_sha256": feed["sha256"],
+        "sha256": new_hash,
+        **delta,
+    }
+    # Delta first, feed.json last: feed.json is what makes a version visible
+    _write_json(os.path.join(directory, delta_file(version)), doc)
+
+    feed["deltas"].append({
+        "version": version,
+        "file": delta_file(version),
+        "created": created,
+        "added": len(delta["added"]),
+        "removed": len(delta["removed"]),
+        "modified": len(delta["modified"]),
+    })
+    for old in feed["deltas"][:-keep] if keep else []:
+        try:
+            os.remove(os.path.join(directory, old["file"]))
+        except FileNotFoundError:
+            pass
+    if keep:
+        feed["deltas"] = feed["deltas"][-keep:]
+    feed.update(version=version, sha256=new_hash, updated=created)
+    _write_json(os.path.join(directory, FEED_FILE), feed)
+    return version
+
+def _load_list(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # empty or corrupt: treat as a fresh file
+
+@contextmanager
+def track(path, feed_dir=DELTA_DIR):
+    """Emits a delta for whatever the block changes in the JSON array at `path`."""
+    old = _load_list(path)
+    yield
+    new = _load_list(path)
+    if new is not None:
+        version = emit_delta(path, old or [], new, feed_dir)
+        if version:
+            print(f"Delta feed: {feed_name(path)} -> version {version}")
+
+# ---------- CLIENT SIDE ----------
+
+def sync(state, name, since_version, feed_dir=DELTA_DIR):
+    """Brings an {itemNo: entry} map at `since_version` up to date.
+    Returns (state, version); raises LookupError if the needed deltas were pruned
+    and ValueError if `state` is not the state of `since_version`."""
+    feed = load_feed(name, feed_dir)
+    needed = [d for d in feed["deltas"] if d["version"] > since_version]
+    if since_version < feed["version"] and (not needed or needed[0]["version"] != since_version + 1):
+        raise LookupError(f"{name}: version {since_version} is too old, refetch the full file")
+
+    for i, entry in enumerate(needed):
+        with open(os.path.join(feed_dir, name, entry["file"]), "r", encoding="utf-8") as f:
+            delta = json.load(f)
+        if i == 0 and state_hash(state) != delta["base_sha256"]:
+            raise ValueError(f"{name}: state is not version {since_version}, refetch the full file")
+        apply_delta(state, delta)
+    if state_hash(state) != feed["sha256"]:
+        raise ValueError(f"{name}: state hash mismatch after sync, refetch the full file")
+    return state, feed["version"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the delta feed of a pipeline output")
+    parser.add_argument("feed", help="feed name, e.g. doterra_products or encyclopedia")
+    parser.add_argument("--since", type=int, default=0, help="only list deltas after this version")
+    parser.add_argument("--dir", default=DELTA_DIR)
+    args = parser.parse_args()
+
+    feed = load_feed(args.feed, args.dir)
+    print(f"{feed['feed']}: version {feed['version']} (sha256 {feed['sha256'][:12]})")
+    for d in feed["deltas"]:
+        if d["version"] > args.since:
+            print(f"  v{d['version']:<6} {d['created']}  +{d['added']} -{d['removed']} ~{d['modified']}")
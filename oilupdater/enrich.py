@@ -0,0 +1,1033 @@
+import argparse
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+
+from .ratelimit import TokenBucket, RETRY_STATUSES, status_of, retry, retry_async
+from .llm_cache import ResponseCache, content_key, normalize_prompt, CACHE_DIR, CACHE_MAX_BYTES
+from .journal import Journal, write_json_array_atomic
+from . import entry_schema
+from .backfill import join_local, llm_part, LOCAL_FIELDS
+from . import delta_feed
+from .llm_metrics import MetricsLog, token_usage, report, METRICS_FILE
+from .cassette import Cassette, CASSETTE_FILE
+
+# ---------------- CONFIG ----------------
+
+BATCH_SIZE = 1             # products per request; > 1 uses the keyed batch prompt
+BATCH_MISSING_RETRIES = 2  # re-ask for products missing from a batch answer
+MAX_OUTPUT_TOKENS = 8192   # deepseek-chat output limit, caps batch max_tokens
+MODEL = "deepseek-chat" # no websearch, for that use another LLM with the PIP.json, then recombine after validating
+
+INPUT_FILE = "doterra_products.json"
+OUTPUT_FILE = "encyclopedia.json"
+PIP_FILE = "PIP.json"
+JOURNAL_FILE = "encyclopedia.journal.jsonl"  # crash-safe progress, removed after a clean run
+API_KEY_FILE = "deepseek_api_key.txt"
+BASE_URL = "https://api.deepseek.com"
+
+CONCURRENCY = 1            # > 1 switches to the asyncio engine
+REQUESTS_PER_SECOND = 2.5  # token bucket rate (replaces the old 0.4s sleep)
+MAX_RETRIES = 5            # retries on 429 / 5xx / connection errors, with backoff + jitter
+REPAIR_RETRIES = 2         # targeted re-asks for fields the local validator cannot repair
+PRINT_RAW_OUTPUT = True    # dump every model answer (--quiet turns it off)
+
+# Input fields that can change the model's answer, and the only ones sent to it.
+# Prices are deliberately left out: backfill.join_local() copies them (with the
+# other identity fields and the category) from INPUT_FILE instead.
+CACHE_KEY_FIELDS = ("itemNo", "name", "nameCN", "size", "unit", "unitCN", "type", "typeCN")
+
+# ----------------------------------------
+
+# pip install openai (imported, and the key read, only once a request is actually sent)
+client = None
+cassette = None  # Cassette while main() records (--record) or replays (--replay) the API calls
+
+def load_api_key(path=API_KEY_FILE):
+    return Path(path).read_text(encoding="utf-8").strip()
+
+def get_client():
+    global client
+    if client is None:
+        import openai
+        # Retries are handled by retry() (counted, with jitter), not hidden in the SDK
+        client = openai.OpenAI(
+            api_key=load_api_key(),
+            base_url=BASE_URL,
+            max_retries=0
+        )
+    return client
+
+SYSTEM_PROMPT = (
+    "You are a strict JSON generator. "
+    "Output ONLY valid JSON. No prose. No markdown."
+)
+
+TASK_PROMPT = """
+You are an expert assistant specializing in essential oils, consumer health communication, and structured data extraction.
+
+Task:
+Generate a structured JSON entry for a essential oil products for use in a consumer website and oil blending tool.
+
+Input:
+- Oil name JSON
+
+Output rules:
+- Output VALID JSON ONLY
+- Do not output itemNo, name, size, unit, prices or category (they are filled in from the price list)
+- Follow the provided schema exactly
+- Do not invent new benefit categories
+- Do not use poetic or vague language
+- Do not make disease treatment claims
+
+Steps:
+1. Usage
+For aromatic, topical, and internal use:
+- Indicate whether use is allowed
+- Assign intent: primary, secondary, or supportive
+- Add brief, practical notes
+2. General Benefits
+For EACH of the following canonical categories:
+sleep, stress, mood, pain, skin, digestive, energy, respiratory, immune, focus
+- Assign a score from 1 to 5
+- Write a concise, factual summary (max 20 words)
+3. Atomic Effects
+List 2–5 atomic effects.
+Each atomic effect MUST:
+- Reference a biological system
+- Describe a directional functional change
+- Explain one or more general benefit scores
+4. Primary Compounds
+List the most commonly referenced major constituents if available.
+5. Evidence
+- Set evidence.level to low, moderate, or strong
+- Set verifiedSource to ‘PIP’
+6. References
+Include:
+- doTERRA product page URL
+- doTERRA PIP URL
+
+Constraints:
+- Plain, confident language
+- Consumer-safe phrasing
+- No citations, no footnotes, no disclaimers
+- No references to FDA or disease claims
+
+With this schema:
+‘
+{
+  ‘usage’: {
+    ‘aromatic’: {
+      ‘allowed’: true,
+      ‘intent’: ‘primary | secondary | supportive’,
+      ‘notes’: ‘string | null’
+    },
+    ‘topical’: {
+      ‘allowed’: true,
+      ‘intent’: ‘primary | secondary | supportive’,
+      ‘dilutionGuidance’: ‘string | null’,
+      ‘notes’: ‘string | null’
+    },
+    ‘internal’: {
+      ‘allowed’: false,
+      ‘intent’: ‘primary | secondary | supportive | null’,
+      ‘notes’: ‘string | null’
+    }
+  },
+
+  ‘generalBenefits’: {
+    ‘sleep’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘stress’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘mood’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘pain’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘skin’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘digestive’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘energy’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘respiratory’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘immune’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    },
+    ‘focus’: {
+      ‘score’: 1,
+      ‘summary’: ‘string’
+    }
+  },
+
+  ‘atomicEffects’: [
+    {
+      ‘mechanism’: ‘string’,
+      ‘domain’: ‘nervous_system | cardiovascular | endocrine | skin_barrier | digestive | respiratory | immune’,
+      ‘description’: ‘string’
+    }
+  ],
+
+  ‘primaryCompounds’: [
+    ‘string’
+  ],
+
+  ‘evidence’: {
+    ‘level’: ‘low | moderate | strong’,
+    ‘verifiedSource’: ‘PIP’
+  },
+
+  ‘references’: {
+    ‘productPage’: ‘url | null’,
+    ‘PIP’: ‘url | null’
+  }
+}
+‘
+
+Here is what an example looks like:
+‘
+{
+  ‘usage’: {
+    ‘aromatic’: {
+      ‘allowed’: true,
+      ‘intent’: ‘primary’,
+      ‘notes’: ‘Commonly diffused for relaxation and sleep support.’
+    },
+    ‘topical’: {
+      ‘allowed’: true,
+      ‘intent’: ‘secondary’,
+      ‘dilutionGuidance’: ‘Dilute for sensitive skin.’,
+      ‘notes’: ‘Often applied to temples or neck.’
+    },
+    ‘internal’: {
+      ‘allowed’: true,
+      ‘intent’: ‘supportive’,
+      ‘notes’: ‘Use only as directed.’
+    }
+  },
+
+  ‘generalBenefits’: {
+    ‘sleep’: {
+      ‘score’: 5,
+      ‘summary’: ‘Strong support for relaxation and restful sleep.’
+    },
+    ‘stress’: {
+      ‘score’: 5,
+      ‘summary’: ‘Helps calm the nervous system.’
+    },
+    ‘mood’: {
+      ‘score’: 5,
+      ‘summary’: ‘Supports emotional balance.’
+    },
+    ‘pain’: {
+      ‘score’: 3,
+      ‘summary’: ‘May ease mild tension.’
+    },
+    ‘skin’: {
+      ‘score’: 4,
+      ‘summary’: ‘Soothes irritated skin.’
+    },
+    ‘digestive’: {
+      ‘score’: 2,
+      ‘summary’: ‘Indirect support through relaxation.’
+    },
+    ‘energy’: {
+      ‘score’: 1,
+      ‘summary’: ‘Not stimulating.’
+    },
+    ‘respiratory’: {
+      ‘score’: 2,
+      ‘summary’: ‘Gentle inhalation support.’
+    },
+    ‘immune’: {
+      ‘score’: 3,
+      ‘summary’: ‘Supports general wellness.’
+    },
+    ‘focus’: {
+      ‘score’: 2,
+      ‘summary’: ‘Improves focus indirectly by reducing stress.’
+    }
+  },
+
+  ‘atomicEffects’: [
+    {
+      ‘mechanism’: ‘Parasympathetic nervous system activation’,
+      ‘domain’: ‘nervous_system’,
+      ‘description’: ‘Associated with reduced sympathetic activity and increased relaxation.’
+    },
+    {
+      ‘mechanism’: ‘Cortisol modulation’,
+      ‘domain’: ‘endocrine’,
+      ‘description’: ‘Observed reductions in stress hormone levels.’
+    },
+    {
+      ‘mechanism’: ‘Mild antimicrobial action’,
+      ‘domain’: ‘immune’,
+      ‘description’: ‘Demonstrated activity against certain bacteria and fungi.’
+    }
+  ],
+
+  ‘primaryCompounds’: [
+    ‘Linalool’,
+    ‘Linalyl acetate’
+  ],
+
+  ‘evidence’: {
+    ‘level’: ‘strong’,
+    ‘verifiedSource’: ‘PIP’
+  },
+
+  ‘references’: {
+    ‘productPage’: ‘https://www.doterra.com/US/en/p/lavender-oil’,
+    ‘PIP’: ‘https://media.doterra.com/us/en/pips/doterra-lavender-essential-oil.pdf’
+  }
+}
+‘
+"""
+
+# ---------- LOAD INPUT ----------
+
+def load_input():
+    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            for v in data.values():
+                if isinstance(v, list):
+                    return v
+        raise ValueError("Could not find input array")
+
+# ---------- LOAD EXISTING OUTPUT ----------
+
+def load_existing():
+    if not Path(OUTPUT_FILE).exists():
+        return []
+
+    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+            if isinstance(data, list):
+                return data
+        except Exception:
+            pass
+
+    return []
+
+# ---------- RESPONSE CACHE ----------
+
+def cache_key(item):
+    fields = {k: item.get(k) for k in CACHE_KEY_FIELDS}
+    return content_key(MODEL, normalize_prompt(SYSTEM_PROMPT), normalize_prompt(TASK_PROMPT), fields)
+
+
+def size_changed(entry, item):
+    try:
+        return float(entry.get("size")) != float(item.get("size"))
+    except (TypeError, ValueError):
+        return False
+
+
+# ---------- CALL DEEPSEEK ----------
+
+BATCH_PROMPT = """
+Batch mode:
+INPUT is a JSON array of several products.
+Return ONE JSON object. Each key is a product's itemNo, each value is that product's complete entry following the schema above.
+Include every product from INPUT exactly once.
+"""
+
+
+def model_input(item):
+    return {k: item.get(k) for k in CACHE_KEY_FIELDS}
+
+
+def build_messages(item):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": TASK_PROMPT + "\n\nINPUT:\n" +
+            json.dumps(model_input(item), ensure_ascii=False)
+        }
+    ]
+
+
+def build_batch_messages(items):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": TASK_PROMPT + BATCH_PROMPT + "\n\nINPUT:\n" +
+            json.dumps([model_input(item) for item in items], ensure_ascii=False)
+        }
+    ]
+
+
+def request_args(items):
+    # A single product always uses the original prompt (same answers, same cache)
+    if len(items) == 1:
+        messages, max_tokens = build_messages(items[0]), 2500
+    else:
+        messages, max_tokens = build_batch_messages(items), min(MAX_OUTPUT_TOKENS, 2500 * len(items))
+    return dict(
+        model=MODEL,
+        messages=messages,
+        response_format={"type": "json_object"},  # IMPORTANT
+        temperature=0,
+        max_tokens=max_tokens,
+        timeout=120
+    )
+
+
+def parse_content(content):
+    if PRINT_RAW_OUTPUT:
+        print("\n--- RAW DEEPSEEK OUTPUT ---")
+        print(content)
+        print("--- END OUTPUT ---\n")
+
+    if not content or not content.strip():
+        raise ValueError("DeepSeek returned empty response")
+
+    return json.loads(content)
+
+
+def parse_batch(content, items):
+    """Map itemNo -> entry for every product the batch answer contains.
+    Malformed or truncated answers yield {} so the products get re-asked."""
+    try:
+        data = parse_content(content)
+    except ValueError:
+        return {}
+
+    wanted = {item.get("itemNo") for item in items}
+    if isinstance(data, dict) and not wanted & set(data):
+        # Tolerate {"products": [...]} style wrappers
+        lists = [v for v in data.values() if isinstance(v, list)]
+        data = lists[0] if lists else data
+    if isinstance(data, list):
+        data = {e.get("itemNo"): e for e in data if isinstance(e, dict)}
+    if not isinstance(data, dict):
+        return {}
+
+    return {k: v for k, v in data.items() if k in wanted and isinstance(v, dict)}
+
+
+def read_response(response, items, usage=None):
+    content = response.choices[0].message.content
+    if len(items) == 1:
+        results = {items[0].get("itemNo"): parse_content(content)}
+    else:
+        results = parse_batch(content, items)
+
+    if usage is not None:
+        usage["products"] += len(results)
+
+    return results
+
+
+def new_usage(log=None):
+    return {"calls": 0, "products": 0, "prompt_tokens": 0, "completion_tokens": 0, "repaired": 0, "reasks": 0,
+            "retries": 0, "replayed": 0, "log": log}
+
+
+def record_call(usage, kind, items, start, response=None, error=None, replayed=False):
+    """Accounts one API call: tokens in `usage`, latency and tokens in its metrics log.
+    A replayed call was answered by the cassette and is counted apart from real ones."""
+    if usage is None:
+        return
+    if response is not None and replayed:
+        usage["replayed"] += 1
+    elif response is not None:
+        tokens = token_usage(response)
+        usage["calls"] += 1
+        usage["prompt_tokens"] += tokens["prompt_tokens"]
+        usage["completion_tokens"] += tokens["completion_tokens"]
+    if usage["log"] is not None:
+        usage["log"].call(kind, items, time.perf_counter() - start, response, error, replayed)
+
+
+def call_kind(items):
+    return "single" if len(items) == 1 else "batch"
+
+
+def create(args, kind, items, usage=None):
+    start = time.perf_counter()
+    replayed = cassette is not None and cassette.replaying
+    try:
+        if replayed:
+            response = cassette.play(args)
+        else:
+            response = get_client().chat.completions.create(**args)
+            if cassette is not None:
+                cassette.record(args, response, kind, items)
+    except Exception as e:
+        record_call(usage, kind, items, start, error=e, replayed=replayed)
+        raise
+    record_call(usage, kind, items, start, response, replayed=replayed)
+    return response
+
+
+def call_deepseek_batch(items, usage=None):
+    response = create(request_args(items), call_kind(items), items, usage)
+    return read_response(response, items, usage)
+
+
+def call_deepseek(item, usage=None):
+    return call_deepseek_batch([item], usage)[item.get("itemNo")]
+
+
+def batches(items, size):
+    size = max(1, size)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def deliver(items, results, on_result):
+    """Report every item found in `results`; returns the ones still missing."""
+    missing = []
+    for item in items:
+        if item.get("itemNo") in results:
+            on_result(item, results[item.get("itemNo")])
+        else:
+            missing.append(item)
+    return missing
+
+
+def describe(batch):
+    if len(batch) == 1:
+        return f"{batch[0].get('name')} ({batch[0].get('itemNo')})"
+    return f"batch of {len(batch)}: " + ", ".join(str(item.get("itemNo")) for item in batch)
+
+# ---------- VALIDATION ----------
+
+FIX_PROMPT = """
+Repair mode:
+Your previous answer for the product in INPUT had these fields missing or invalid:
+{problems}
+Return ONE JSON object containing ONLY these keys: {fields}. Each value must be complete and follow the schema above.
+"""
+
+
+def validate(item, result, usage=None):
+    """Local schema check + repair. Returns (entry, {field: problem}) where the
+    problems are the fields only the model can fix."""
+    if isinstance(result, dict):
+        # Whatever the model said about the local fields is dropped, not used as a fallback
+        result = {k: v for k, v in result.items() if k not in LOCAL_FIELDS}
+        join_local(result, item)
+
+    entry, fixes, invalid = entry_schema.check(result)
+    if fixes and usage is not None:
+        usage["repaired"] += 1
+    for k in LOCAL_FIELDS:
+        if invalid.pop(k, None):
+            print(f"⚠️ {describe([item])}: {k} is invalid in the source data")
+    return entry, invalid
+
+
+def fix_args(item, invalid):
+    prompt = FIX_PROMPT.format(problems="\n".join(f"- {p}" for p in invalid.values()),
+                               fields=", ".join(invalid))
+    return dict(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user",
+             "content": TASK_PROMPT + prompt + "\n\nINPUT:\n" + json.dumps(model_input(item), ensure_ascii=False)},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0,
+        max_tokens=min(2500, 800 * len(invalid)),
+        timeout=120
+    )
+
+
+def merge_fix(entry, response, invalid, usage=None):
+    """Takes the re-asked fields from a repair answer."""
+    data = parse_content(response.choices[0].message.content)
+    if usage is not None:
+        usage["reasks"] += 1
+    if isinstance(data, dict):
+        entry = dict(entry)
+        entry.update({k: data[k] for k in invalid if k in data})
+    return entry
+
+
+def invalid_error(invalid):
+    return ValueError("invalid fields after repair: " + "; ".join(invalid.values()))
+
+
+def is_retryable(exc):
+    import openai
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status = status_of(exc)
+    return status is not None and (status in RETRY_STATUSES or status >= 500)
+
+
+def retry_reporter(usage, retries):
+    """on_retry callback for retry() / retry_async(): counts and prints every retry."""
+    def on_retry(e, attempt, delay):
+        if usage is not None:
+            usage["retries"] += 1
+        print(f"↻ Retry {attempt}/{retries} in {delay:.1f}s ({status_of(e) or type(e).__name__})")
+    return on_retry
+
+
+def complete(item, result, limiter, usage=None, retries=MAX_RETRIES):
+    """Validated entry for one answer, re-asking only for unrepairable fields."""
+    entry, invalid = validate(item, result, usage)
+    for _ in range(REPAIR_RETRIES):
+        if not invalid:
+            break
+        print(f"↻ Re-asking {describe([item])} for: {', '.join(invalid)}")
+        args = fix_args(item, invalid)
+
+        def attempt():
+            limiter.wait()
+            return create(args, "reask", [item], usage)
+
+        response = retry(attempt, is_retryable, retries=retries, on_retry=retry_reporter(usage, retries))
+        entry, invalid = validate(item, merge_fix(entry, response, invalid, usage), usage)
+    if invalid:
+        raise invalid_error(invalid)
+    return entry
+
+
+def complete_all(items, results, complete_one):
+    """Runs complete_one over a batch answer; failures become the item's result."""
+    for item in items:
+        item_id = item.get("itemNo")
+        if item_id in results:
+            try:
+                results[item_id] = complete_one(item, results[item_id])
+            except Exception as e:
+                results[item_id] = e
+    return results
+
+# ---------- ASYNC ENGINE ----------
+
+
+async def create_async(aclient, args, kind, items, usage=None):
+    start = time.perf_counter()
+    replayed = cassette is not None and cassette.replaying
+    try:
+        if replayed:
+            response = cassette.play(args)
+        else:
+            response = await aclient.chat.completions.create(**args)
+            if cassette is not None:
+                cassette.record(args, response, kind, items)
+    except Exception as e:
+        record_call(usage, kind, items, start, error=e, replayed=replayed)
+        raise
+    record_call(usage, kind, items, start, response, replayed=replayed)
+    return response
+
+
+async def call_deepseek_batch_async(aclient, items, usage=None):
+    response = await create_async(aclient, request_args(items), call_kind(items), items, usage)
+    return read_response(response, items, usage)
+
+
+async def enrich_async(pending, on_result, concurrency, rate, retries=MAX_RETRIES,
+                       batch_size=BATCH_SIZE, usage=None):
+    """Enrich `pending` items concurrently, calling on_result(item, result | exception)
+    as soon as each one finishes."""
+    import asyncio
+    aclient = None  # a replay sends nothing
+    if cassette is None or not cassette.replaying:
+        import openai
+        # Retries are handled here (with jitter), not by the SDK
+        aclient = openai.AsyncOpenAI(api_key=load_api_key(), base_url=BASE_URL, max_retries=0)
+    limiter = TokenBucket(rate, capacity=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    on_retry = retry_reporter(usage, retries)
+
+    async def complete_async(item, result):
+        entry, invalid = validate(item, result, usage)
+        for _ in range(REPAIR_RETRIES):
+            if not invalid:
+                break
+            print(f"↻ Re-asking {describe([item])} for: {', '.join(invalid)}")
+
+            args = fix_args(item, invalid)
+
+            async def attempt():
+                await limiter.acquire()
+                return await create_async(aclient, args, "reask", [item], usage)
+
+            response = await retry_async(attempt, is_retryable, retries=retries, on_retry=on_retry)
+            entry, invalid = validate(item, merge_fix(entry, response, invalid, usage), usage)
+        if invalid:
+            raise invalid_error(invalid)
+        return entry
+
+    async def complete_batch(items, results):
+        found = [item for item in items if item.get("itemNo") in results]
+        done = await asyncio.gather(*(complete_async(item, results[item.get("itemNo")]) for item in found),
+                                    return_exceptions=True)
+        for item, entry in zip(found, done):
+            results[item.get("itemNo")] = entry
+        return results
+
+    async def one(batch):
+        async with semaphore:
+            remaining = batch
+            for _ in range(BATCH_MISSING_RETRIES + 1):
+                print(f"→ Processing: {describe(remaining)}")
+
+                async def attempt():
+                    await limiter.acquire()
+                    return await call_deepseek_batch_async(aclient, remaining, usage)
+
+                try:
+                    results = await retry_async(attempt, is_retryable, retries=retries, on_retry=on_retry)
+                except Exception as e:
+                    for item in remaining:
+                        on_result(item, e)
+                    return
+
+                results = await complete_batch(remaining, results)
+
+                remaining = deliver(remaining, results, on_result)
+                if not remaining:
+                    return
+                print(f"↻ {len(remaining)} product(s) missing from batch answer, re-asking only those")
+
+            for item in remaining:
+                on_result(item, ValueError("missing from batch answer"))
+
+    try:
+        await asyncio.gather(*(one(batch) for batch in batches(pending, batch_size)))
+    finally:
+        if aclient is not None:
+            await aclient.close()
+
+
+def enrich_serial(pending, on_result, rate, batch_size=BATCH_SIZE, usage=None, retries=MAX_RETRIES):
+    limiter = TokenBucket(rate)
+    on_retry = retry_reporter(usage, retries)
+    for batch in batches(pending, batch_size):
+        remaining = batch
+        for _ in range(BATCH_MISSING_RETRIES + 1):
+            print(f"→ Processing: {describe(remaining)}")
+
+            def attempt():
+                limiter.wait()  # polite delay
+                return call_deepseek_batch(remaining, usage)
+
+            try:
+                results = retry(attempt, is_retryable, retries=retries, on_retry=on_retry)
+            except Exception as e:
+                for item in remaining:
+                    on_result(item, e)
+                remaining = []
+                break
+
+            results = complete_all(remaining, results,
+                                   lambda item, result: complete(item, result, limiter, usage, retries))
+
+            remaining = deliver(remaining, results, on_result)
+            if not remaining:
+                break
+            print(f"↻ {len(remaining)} product(s) missing from batch answer, re-asking only those")
+
+        for item in remaining:
+            on_result(item, ValueError("missing from batch answer"))
+
+# ---------- MAIN ----------
+
+
+def compact(existing, source, journal, offsets, source_map):
+    """Stream the final encyclopedia: existing entries (superseded ones swapped for
+    their journaled replacement), then newly journaled entries in source order."""
+    emitted = set()
+    for e in existing:
+        item_id = e.get("itemNo") if isinstance(e, dict) else None
+        if item_id in offsets:
+            e = journal.read_at(offsets[item_id])
+        emitted.add(item_id)
+        yield e
+
+    order = [item.get("itemNo") for item in source] + list(offsets)
+    for item_id in order:
+        if item_id in offsets and item_id not in emitted:
+            emitted.add(item_id)
+            e = journal.read_at(offsets[item_id])
+            if item_id in source_map:
+                join_local(e, source_map[item_id])
+            yield e
+
+
+def main(concurrency=CONCURRENCY, rate=REQUESTS_PER_SECOND, refresh=False,
+         cache_dir=CACHE_DIR, cache_max_bytes=CACHE_MAX_BYTES, journal_path=JOURNAL_FILE,
+         batch_size=BATCH_SIZE, quiet=False, metrics_path=METRICS_FILE,
+         cassette_mode=None, cassette_path=CASSETTE_FILE, rebuild=False):
+    global PRINT_RAW_OUTPUT, cassette
+    if quiet:
+        PRINT_RAW_OUTPUT = False
+    if cassette_mode:
+        cassette = Cassette(cassette_path, cassette_mode)
+        refresh = True  # cached answers would bypass the cassette
+        if cassette.replaying:
+            rate = 0  # nothing is sent: no rate limit
+
+    source = load_input()
+    existing = load_existing()
+
+    existing_ids = {e.get("itemNo") for e in existing if isinstance(e, dict)}
+
+    total = len(source)
+    counts = {"skipped": 0, "new": 0, "failed": 0, "cache": 0, "synced": 0}
+
+    # ---------- LOCAL JOIN ----------
+    # Identity, prices and category come from the scrape, never from the model.
+    # A changed size means the answer can change, so those entries are re-enriched
+    # (--rebuild: all of them). They are joined too: one whose re-enrichment fails
+    # keeps its old model fields, but with this scrape's size and prices.
+    source_map = {}
+    for item in source:
+        source_map.setdefault(item.get("itemNo"), item)  # first occurrence wins, as in the loop below
+    stale_ids = set()
+    for e in existing:
+        if not isinstance(e, dict) or e.get("itemNo") not in source_map:
+            continue
+        item = source_map[e.get("itemNo")]
+        stale = rebuild or size_changed(e, item)  # before the join overwrites the size
+        if join_local(e, item) and not stale:
+            counts["synced"] += 1
+        if stale:
+            stale_ids.add(e.get("itemNo"))
+    existing_ids -= stale_ids
+
+    # ---------- PIP COLLECTION ----------
+    pip_entries = []
+
+    # Extract PIP from existing encyclopedia entries (stale ones too: a failed
+    # re-enrichment keeps its old row, a successful one replaces it below)
+    for e in existing:
+        if isinstance(e, dict):
+            pip_entries.append({
+                "id": e.get("id") or e.get("itemNo"),
+                "name": e.get("name"),
+                "pip": e.get("pip") or (e.get("references") or {}).get("PIP")
+            })
+
+    # ---------- REPLAY JOURNAL ----------
+    # Results journaled by an interrupted run count as done. Only
+    # itemNo -> offset is kept in memory; entries are re-read when compacting.
+    journal = Journal(journal_path)
+    offsets = {}
+    for offset, e in journal.replay():
+        item_id = e.get("itemNo")
+        offsets[item_id] = offset
+        existing_ids.add(item_id)
+        pip_entries.append({
+            "id": e.get("id") or item_id,
+            "name": e.get("name"),
+            "pip": e.get("references", {}).get("PIP")
+        })
+
+    print(f"Total source items: {total}")
+    print(f"Existing encyclopedia entries: {len(existing_ids)}")
+    if offsets:
+        print(f"Recovered from journal: {len(offsets)}")
+    print("-" * 50)
+
+    # Skip known items up front (duplicates in the source are enriched once)
+    pending = []
+    scheduled = set()
+    for item in source:
+        item_id = item.get("itemNo")
+
+        if item_id in existing_ids or item_id in scheduled:
+            counts["skipped"] += 1
+            continue
+
+        scheduled.add(item_id)
+        pending.append(item)
+
+    cache = ResponseCache(cache_dir, cache_max_bytes)
+    keys = {item.get("itemNo"): cache_key(item) for item in pending}
+
+    def on_result(item, result, cached=False):
+        # Called once per product, as soon as its answer is available
+        item_id = item.get("itemNo")
+
+        try:
+            if isinstance(result, Exception):
+                raise result
+
+            if not isinstance(result, dict):
+                raise ValueError("DeepSeek did not return a JSON object")
+
+            if not cached and cassette_mode != "replay":  # a replayed answer is not a new one
+                cache.put(keys[item_id], llm_part(result))
+
+            join_local(result, item)
+
+            # Add lastUpdated programmatically
+            result["lastUpdated"] = datetime.utcnow().strftime("%Y-%m-%d")
+
+            offsets[item_id] = journal.append(result)
+            existing_ids.add(item_id)
+
+            # ---------- ADD TO PIP LIST ----------
+            pip_entries.append({
+                "id": result.get("id") or result.get("itemNo"),
+                "name": result.get("name"),
+                "pip": result.get("references", {}).get("PIP")
+            })
+
+            counts["new"] += 1
+
+        except Exception as e:
+            counts["failed"] += 1
+            print(f"⚠️ Failed: {item.get('name')} | {e}")
+
+    # ---------- CACHE LOOKUP ----------
+    # Cached answers pass the same validator; ones it cannot repair are asked again
+    log = MetricsLog(metrics_path, model=MODEL, concurrency=concurrency, rate=rate, batch_size=batch_size,
+                     cassette=cassette_mode)
+    usage = new_usage(log)
+    misses = []
+    for item in pending:
+        cached = None if refresh else cache.get(keys[item.get("itemNo")])
+        if isinstance(cached, dict):
+            entry, invalid = validate(item, cached, usage)
+            if not invalid:
+                counts["cache"] += 1
+                on_result(item, entry, cached=True)
+                continue
+        misses.append(item)
+    try:
+        if concurrency > 1 and misses:
+            print(f"Async engine: concurrency={concurrency}, rate={rate}/s, batch size={batch_size}")
+            import asyncio
+            asyncio.run(enrich_async(misses, on_result, concurrency, rate,
+                                     batch_size=batch_size, usage=usage))
+        else:
+            enrich_serial(misses, on_result, rate, batch_size=batch_size, usage=usage)
+    finally:
+        journal.close()
+        if cassette_mode:
+            cassette.close()
+
+    # ---------- WRITE encyclopedia.json ----------
+    # Atomic compaction of existing + journal; the journal goes only once both files are in place
+    with delta_feed.track(OUTPUT_FILE):
+        final_size = write_json_array_atomic(
+            OUTPUT_FILE, compact(existing, source, journal, offsets, source_map)
+        )
+
+    # ---------- WRITE PIP.json ----------
+    # Deduplicate by id (PIP.json must be clean); the latest row wins, in first-seen order
+    pip_rows = {}
+    for p in pip_entries:
+        pid = p.get("id")
+        if pid:
+            pip_rows[pid] = p
+    pip_clean = list(pip_rows.values())
+
+    write_json_array_atomic(PIP_FILE, pip_clean)
+    journal.clear()
+
+    metrics = None
+    if log.calls or counts["cache"]:  # no-op runs leave no record
+        metrics = log.finish(usage["products"], cache_hits=counts["cache"],
+                             retries=usage["retries"], repaired=usage["repaired"], reasks=usage["reasks"],
+                             failed=counts["failed"])
+
+    # ---------- SUMMARY ----------
+
+    print("\n" + "=" * 60)
+    print("DEEPSEEK ENRICHMENT SUMMARY")
+    print("=" * 60)
+    print(f"Total source items:       {total}")
+    print(f"Already existed (skip):   {counts['skipped']}")
+    print(f"Newly enriched:          {counts['new']}")
+    print(f"  from cache:            {counts['cache']}")
+    print(f"{'Re-enriched (rebuild):' if rebuild else 'Re-enriched (size diff):':<25}{len(stale_ids)}")
+    print(f"Synced from price list:  {counts['synced']}")
+    print(f"Failed:                  {counts['failed']}")
+    print(f"Final encyclopedia size: {final_size}")
+    print(f"PIP entries exported:    {len(pip_clean)}")
+    if usage["products"] and cassette_mode != "replay":
+        print(f"API calls:               {usage['calls']} (batch size {batch_size})")
+    print(f"Repaired locally:        {usage['repaired']}")
+    print(f"Field re-asks:           {usage['reasks']}")
+    if cassette_mode == "record":
+        print(f"Recorded calls:          {cassette.recorded} (-> {cassette.path})")
+    elif cassette_mode == "replay":
+        print(f"Replayed calls:          {cassette.played} of {len(cassette)} recorded, {cassette.missed} not recorded")
+    print(f"Output files:")
+    print(f" - {OUTPUT_FILE}")
+    print(f" - {PIP_FILE}")
+    if metrics_path and metrics:
+        print(f" - {metrics_path} (run {log.run})")
+    print("=" * 60)
+    if metrics:
+        report(metrics, "ENRICHMENT METRICS")
+    if cassette_mode:
+        cassette = None
+    print("Done.")
+    return counts
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Enrich doterra_products.json into encyclopedia.json")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="parallel requests; > 1 uses the asyncio engine")
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND,
+                        help="max requests started per second")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="products per request (keyed JSON answer)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignore cached responses and call the API again")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--cache-max-mb", type=float, default=CACHE_MAX_BYTES / 1024 / 1024,
+                        help="LRU eviction threshold for the response cache")
+    parser.add_argument("--quiet", action="store_true", help="don't print the raw model output of each call")
+    parser.add_argument("--metrics", default=METRICS_FILE,
+                        help="per-call metrics log (JSONL); report with: python -m oilupdater.llm_metrics")
+    parser.add_argument("--no-metrics", action="store_true", help="don't write the metrics log")
+    tape = parser.add_mutually_exclusive_group()
+    tape.add_argument("--record", nargs="?", const=CASSETTE_FILE, metavar="CASSETTE",
+                      help=f"also append every API call to a cassette (default {CASSETTE_FILE})")
+    tape.add_argument("--replay", nargs="?", const=CASSETTE_FILE, metavar="CASSETTE",
+                      help="answer from a recorded cassette instead of the API (offline, no rate limit)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="enrich every product again, not only the ones missing from the encyclopedia")
+    args = parser.parse_args(argv)
+    if args.replay and not Path(args.replay).exists():
+        parser.error(f"no cassette at {args.replay} (record one with --record {args.replay})")
+
+    main(concurrency=args.concurrency, rate=args.rps, refresh=args.refresh,
+         cache_dir=args.cache_dir, cache_max_bytes=int(args.cache_max_mb * 1024 * 1024),
+         batch_size=args.batch_size, quiet=args.quiet, metrics_path=None if args.no_metrics else args.metrics,
+         cassette_mode="record" if args.record else "replay" if args.replay else None,
+         cassette_path=args.record or args.replay or CASSETTE_FILE, rebuild=args.rebuild)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,264 @@
+import re
+import json
+import argparse
+
+# Validator / repairer for encyclopedia entries (the schema in TASK_PROMPT of
+# 2.deepseek_enrich.py). The schema below is compiled once into a tree of
+# field checkers; check() walks an entry, fixes what can be fixed
+# deterministically (score clamping, enum spelling, missing nullable fields)
+# and returns the top-level fields that only the model can fill in.
+
+BENEFITS = ("sleep", "stress", "mood", "pain", "skin", "digestive", "energy", "respiratory", "immune", "focus")
+INTENTS = ("primary", "secondary", "supportive")
+DOMAINS = ("nervous_system", "cardiovascular", "endocrine", "skin_barrier", "digestive", "respiratory", "immune")
+EVIDENCE_LEVELS = ("low", "moderate", "strong")
+CATEGORIES = ("Single Oil", "Personal Care", "doTERRA Women", "Essential Oil Blends", "Touch",
+              "Wellness", "Supplements", "Others")
+
+# Spellings the model drifts into -> canonical enum value
+ALIASES = {
+    "nervous": "nervous_system", "nervous system": "nervous_system", "neurological": "nervous_system",
+    "skin": "skin_barrier", "skin barrier": "skin_barrier", "dermal": "skin_barrier", "integumentary": "skin_barrier",
+    "digestion": "digestive", "gastrointestinal": "digestive",
+    "respiration": "respiratory", "immunity": "immune", "immune system": "immune",
+    "hormonal": "endocrine", "circulatory": "cardiovascular",
+    "secondary use": "secondary", "primary use": "primary", "support": "supportive",
+    "medium": "moderate", "limited": "low", "weak": "low", "high": "strong",
+    "single oils": "Single Oil", "blends": "Essential Oil Blends", "essential oil blend": "Essential Oil Blends",
+    "supplement": "Supplements", "other": "Others",
+}
+
+SCORE_RANGE = (1, 5)
+EFFECTS_RANGE = (2, 5)
+URL_RE = re.compile(r'^https?://\S+$')
+
+
+class Invalid(Exception):
+    """A value that cannot be repaired locally."""
+
+
+def _key(value):
+    return re.sub(r'[\s_\-]+', ' ', str(value)).strip().lower()
+
+# ---------- FIELD CHECKERS ----------
+# Each checker returns the (possibly repaired) value, appends a description of
+# every repair to `fixes`, and raises Invalid when the model has to answer again.
+
+class Enum:
+    def __init__(self, values, nullable=False):
+        self.nullable = nullable
+        self.lookup = {_key(v): v for v in values}
+        self.lookup.update({_key(a): v for a, v in ALIASES.items() if v in values})
+
+    def __call__(self, value, path, fixes):
+        if value is None:
+            if self.nullable: return None
+            raise Invalid(f"{path}: missing")
+        canonical = self.lookup.get(_key(value))
+        if canonical is None:
+            if self.nullable:
+                fixes.append(f"{path}: unknown {value!r} -> null")
+                return None
+            raise Invalid(f"{path}: unknown value {value!r}")
+        if canonical != value:
+            fixes.append(f"{path}: {value!r} -> {canonical!r}")
+        return canonical
+
+class Score:
+    def __call__(self, value, path, fixes):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise Invalid(f"{path}: not a score ({value!r})")
+        fixed = int(min(SCORE_RANGE[1], max(SCORE_RANGE[0], round(number))))
+        if fixed != value or isinstance(value, bool):
+            fixes.append(f"{path}: {value!r} -> {fixed}")
+        return fixed
+
+class Number:
+    def __call__(self, value, path, fixes):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        try:
+            number = float(str(value).replace(",", ""))
+        except (TypeError, ValueError):
+            raise Invalid(f"{path}: not a number ({value!r})")
+        fixed = int(number) if number.is_integer() else number
+        fixes.append(f"{path}: {value!r} -> {fixed}")
+        return fixed
+
+class Bool:
+    TRUE, FALSE = {"true", "yes", "y", "1"}, {"false", "no", "n", "0"}
+
+    def __call__(self, value, path, fixes):
+        if isinstance(value, bool): return value
+        text = _key(value)
+        if text in self.TRUE or text in self.FALSE:
+            fixes.append(f"{path}: {value!r} -> {text in self.TRUE}")
+            return text in self.TRUE
+        raise Invalid(f"{path}: not a boolean ({value!r})")
+
+class Text:
+    def __init__(self, nullable=False):
+        self.nullable = nullable
+
+    def __call__(self, value, path, fixes):
+        if isinstance(value, str) and value.strip():
+            return value
+        if self.nullable:
+            if value is not None:
+                fixes.append(f"{path}: {value!r} -> null")
+            return None
+        raise Invalid(f"{path}: missing text")
+
+class Url:
+    def __call__(self, value, path, fixes):
+        if value is None or (isinstance(value, str) and URL_RE.match(value.strip())):
+            return value.strip() if value else None
+        fixes.append(f"{path}: {value!r} -> null")
+        return None
+
+class Const:
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, value, path, fixes):
+        if value != self.value:
+            fixes.append(f"{path}: {value!r} -> {self.value!r}")
+        return self.value
+
+class Obj:
+    def __init__(self, fields, extra=True, default_missing=False):
+        self.fields = fields
+        self.extra = extra                    # keep keys the schema doesn't know
+        self.default_missing = default_missing  # missing object: build it from nullable fields
+
+    def __call__(self, value, path, fixes):
+        if value is None and self.default_missing:
+            fixes.append(f"{path}: missing -> filled with nulls")
+            value = {}
+        if not isinstance(value, dict):
+            raise Invalid(f"{path}: missing object")
+        result = {}
+        for name, checker in self.fields.items():
+            result[name] = checker(value.get(name), f"{path}.{name}", fixes)
+        for name in value:
+            if name not in self.fields:
+                if self.extra:
+                    result[name] = value[name]
+                else:
+                    fixes.append(f"{path}.{name}: unknown key dropped")
+        return result
+
+class List:
+    def __init__(self, item, min_len=0, max_len=None, wrap=False):
+        self.item, self.min_len, self.max_len, self.wrap = item, min_len, max_len, wrap
+
+    def __call__(self, value, path, fixes):
+        if value is None:
+            value = []
+            fixes.append(f"{path}: missing -> []")
+        elif self.wrap and not isinstance(value, list):
+            fixes.append(f"{path}: single value -> list")
+            value = [value]
+        if not isinstance(value, list):
+            raise Invalid(f"{path}: not a list")
+        result = []
+        for i, element in enumerate(value):
+            try:
+                result.append(self.item(element, f"{path}[{i}]", fixes))
+            except Invalid as e:
+                fixes.append(f"{e} (dropped)")  # one bad element: drop it, keep the rest
+        if len(result) < self.min_len:
+            raise Invalid(f"{path}: {len(result)} valid item(s), need {self.min_len}")
+        if self.max_len is not None and len(result) > self.max_len:
+            fixes.append(f"{path}: {len(result)} items -> {self.max_len}")
+            result = result[:self.max_len]
+        return result
+
+class Route:
+    """One usage route: intent may only be null when the route is not allowed."""
+
+    def __init__(self, fields):
+        self.obj = Obj(fields)
+
+    def __call__(self, value, path, fixes):
+        value = self.obj(value, path, fixes)
+        if value["allowed"] and value["intent"] is None:
+            raise Invalid(f"{path}.intent: missing for an allowed route")
+        return value
+
+# ---------- SCHEMA ----------
+
+def _route(dilution=False):
+    fields = {"allowed": Bool(), "intent": Enum(INTENTS, nullable=True), "notes": Text(nullable=True)}
+    if dilution:
+        fields["dilutionGuidance"] = Text(nullable=True)
+    return Route(fields)
+
+# Top-level field -> checker, in the order of TASK_PROMPT
+SCHEMA = {
+    "itemNo": Text(),
+    "name": Text(),
+    "size": Number(),
+    "unit": Text(),
+    "prices": Obj({"retail_hkd": Number(), "member_hkd": Number()}),
+    "category": Enum(CATEGORIES),
+    "usage": Obj({"aromatic": _route(), "topical": _route(dilution=True), "internal": _route()}),
+    "generalBenefits": Obj({b: Obj({"score": Score(), "summary": Text()}) for b in BENEFITS}, extra=False),
+    "atomicEffects": List(Obj({"mechanism": Text(), "domain": Enum(DOMAINS), "description": Text()}),
+                          *EFFECTS_RANGE),
+    "primaryCompounds": List(Text(), wrap=True),
+    "evidence": Obj({"level": Enum(EVIDENCE_LEVELS), "verifiedSource": Const("PIP")}),
+    "references": Obj({"productPage": Url(), "PIP": Url()}, default_missing=True),
+}
+
+def check(entry, schema=SCHEMA):
+    """Validates and repairs one entry.
+    Returns (repaired entry, list of repairs, {field: problem} for fields the model must redo).
+    Unknown top-level keys (lastUpdated, ...) are kept as they are."""
+    if not isinstance(entry, dict):
+        return entry, [], {"*": "not a JSON object"}
+    fixes, invalid = [], {}
+    result = {}
+    for name, checker in schema.items():
+        try:
+            result[name] = checker(entry.get(name), name, fixes)
+        except Invalid as e:
+            invalid[name] = str(e)
+            if name in entry:
+                result[name] = entry[name]
+    for name in entry:
+        if name not in schema:
+            result[name] = entry[name]
+    return result, fixes, invalid
+
+def audit(entries):
+    """Counts of repairs and invalid fields over a whole encyclopedia."""
+    report = {"entries": len(entries), "clean": 0, "repaired": 0, "invalid": 0, "fields": {}}
+    for entry in entries:
+        _, fixes, invalid = check(entry)
+        if invalid:
+            report["invalid"] += 1
+        elif fixes:
+            report["repaired"] += 1
+        else:
+            report["clean"] += 1
+        for name in invalid:
+            report["fields"][name] = report["fields"].get(name, 0) + 1
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate encyclopedia.json against the enrichment schema")
+    parser.add_argument("file", nargs="?", default="encyclopedia.json")
+    parser.add_argument("--verbose", action="store_true", help="print every repair and problem")
+    args = parser.parse_args()
+
+    with open(args.file, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if args.verbose:
+        for entry in entries:
+            _, fixes, invalid = check(entry)
+            for line in fixes + list(invalid.values()):
+                print(f"{entry.get('itemNo') if isinstance(entry, dict) else '?'}: {line}")
+    print(json.dumps(audit(entries), ensure_ascii=False, indent=2))
@@ -0,0 +1,91 @@
+import json
+import os
+from pathlib import Path
+
+# Append-only JSON-lines journal + atomic JSON writers.
+# Each line is fsync'ed before append() returns, so a crash loses at most the
+# result that was being written. A torn last line is ignored on replay and cut
+# off before the next append, so it cannot swallow the line written after it.
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._f = None
+        self._end = None  # bytes up to the end of the last complete line, set by replay()
+
+    def append(self, entry):
+        """Durably append one entry; returns its byte offset for read_at()."""
+        if self._f is None:
+            if self.path.exists():
+                if self._end is None:
+                    for _ in self.replay():
+                        pass
+                os.truncate(self.path, self._end)
+            self._f = open(self.path, "ab")
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        offset = self._f.tell()
+        self._f.write(line + b"\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return offset
+
+    def replay(self):
+        """Yield (offset, entry) for every complete, valid line."""
+        if not self.path.exists():
+            return
+        end = 0
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                start, offset = offset, offset + len(line)
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crash
+                end = offset
+                try:
+                    yield start, json.loads(line)
+                except ValueError:
+                    continue
+        self._end = end  # only once the whole file was read
+
+    def read_at(self, offset):
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def clear(self):
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def _fsync_replace(tmp, path):
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def write_json_array_atomic(path, items, indent=2):
+    """Stream `items` to `path` as a JSON array (byte-identical to json.dump(list, indent=2)),
+    via a temp file + rename so readers never see a half-written file."""
+    tmp = f"{path}.tmp"
+    pad = " " * indent
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for item in items:
+            body = json.dumps(item, ensure_ascii=False, indent=indent).replace("\n", "\n" + pad)
+            f.write(("[\n" if count == 0 else ",\n") + pad + body)
+            count += 1
+        f.write("\n]" if count else "[]")
+        f.flush()
+        os.fsync(f.fileno())
+    _fsync_replace(tmp, path)
+    return count
@@ -0,0 +1,146 @@
+import re
+
+from .row_classifier import ID_RE, classify_line, split_description, build_product
+
+# Layout-aware extraction: assigns pdfplumber words to table columns by their
+# x coordinates instead of re-splitting flattened text with regexes.
+# A price split into two words by the PDF layout ("3" + "95.00") lands in the
+# same column and is simply re-joined, so no stray-digit heuristics are needed.
+
+ROW_TOLERANCE = 3    # words whose tops differ by less than this are on the same row
+WORD_X_TOLERANCE = 2  # pdfplumber: max gap between chars of one word
+
+# Header words that mark the price columns (EN or CN label)
+COLUMN_ANCHORS = {
+    "retail": ("Retail", "零售價"),
+    "member": ("Wholesale", "批發價", "會員價"),
+    "pv": ("PV", "積分"),
+}
+
+PRICE_TOKEN_RE = re.compile(r'^[0-9,]*\.\d{2}$|^\d+$')
+
+def group_rows(words):
+    """Clusters words into visual rows (top to bottom, left to right)."""
+    rows = []
+    for word in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if rows and abs(word["top"] - rows[-1][0]) < ROW_TOLERANCE:
+            rows[-1][1].append(word)
+        else:
+            rows.append([word["top"], [word]])
+    return [sorted(row, key=lambda w: w["x0"]) for _, row in rows]
+
+def row_text(row):
+    return " ".join(w["text"] for w in row)
+
+def find_columns(row):
+    """Column boundaries from a table header row, or None if this isn't one.
+    Returns {"retail": x, "member": x, "pv": x}: the left edge of each column."""
+    centers = {}
+    for name, labels in COLUMN_ANCHORS.items():
+        for w in row:
+            if w["text"] in labels or any(w["text"].startswith(label) for label in labels):
+                centers.setdefault(name, (w["x0"] + w["x1"]) / 2)
+                break
+    if "retail" not in centers or "member" not in centers:
+        return None
+
+    # Prices are right-aligned under their labels: cut midway between label centers
+    gap = centers["member"] - centers["retail"]
+    columns = {"retail": centers["retail"] - gap / 2, "member": centers["retail"] + gap / 2}
+    columns["pv"] = (centers["member"] + centers["pv"]) / 2 if "pv" in centers else centers["member"] + gap / 2
+    return columns
+
+def parse_layout_row(row, columns):
+    """Product dict from one visual row, using column positions; None if not a product."""
+    description, retail, member = [], [], []
+    for w in row:
+        center = (w["x0"] + w["x1"]) / 2
+        if center < columns["retail"]:
+            description.append(w["text"])
+        elif center < columns["member"]:
+            retail.append(w["text"])
+        elif center < columns["pv"]:
+            member.append(w["text"])
+
+    # Tokens of one cell are re-joined without spaces ("3" + "95.00" -> "395.00")
+    retail_raw = "".join(retail).replace(',', '')
+    member_raw = "".join(member).replace(',', '')
+    if not (PRICE_TOKEN_RE.match(retail_raw) and PRICE_TOKEN_RE.match(member_raw)):
+        return None
+
+    id_match = ID_RE.match(" ".join(description))
+    if not id_match: return None
+
+    size_val, unit_str, name_str = split_description(id_match.group(2).strip())
+    return build_product(id_match.group(1), size_val, unit_str, name_str, retail_raw, member_raw)
+
+def scan_words(words, columns=None):
+    """Events of one page from its words. Returns (events, columns) so the column
+    layout found on one page carries over to continuation pages without a header."""
+    events = []
+    for row in group_rows(words):
+        found = find_columns(row)
+        if found:
+            columns = found
+            continue
+
+        data = None
+        if columns and re.match(r'^\d{5,}$', row[0]["text"]):
+            data = parse_layout_row(row, columns)
+        if data:
+            events.append(("product", data))
+            continue
+
+        # Headers, garbage, and rows seen before any column header: text rules
+        event = classify_line(row_text(row))
+        if event: events.append(event)
+    return events, columns
+
+def page_words(page):
+    return page.extract_words(x_tolerance=WORD_X_TOLERANCE, keep_blank_chars=False)
+
+def columns_before(pages, index):
+    """Columns in effect at the top of pages[index]: those of the last table header
+    on an earlier page (what a serial scan would carry over), or None."""
+    for page in reversed(pages[:index]):
+        columns = None
+        for row in group_rows(page_words(page)):
+            columns = find_columns(row) or columns
+        if hasattr(page, "close"):
+            page.close()
+        if columns:
+            return columns
+    return None
+
+def iter_page_events(pages, columns=None):
+    """Yields one list of events per page, releasing each page's parsed objects
+    afterwards so memory stays flat on long brochures."""
+    for page in pages:
+        events, columns = scan_words(page_words(page), columns)
+        if hasattr(page, "close"):
+            page.close()
+        yield events
+
+# ---------- ENGINE DIFF ----------
+
+def diff_products(a, b, a_name="text", b_name="layout"):
+    """Compares two product lists by itemNo.
+    Returns {"only_<a>": [...], "only_<b>": [...], "changed": {itemNo: {field: [a, b]}}}."""
+    a_map, b_map = {}, {}
+    for p in a: a_map.setdefault(p["itemNo"], p)
+    for p in b: b_map.setdefault(p["itemNo"], p)
+
+    changed = {}
+    for item_id in a_map.keys() & b_map.keys():
+        fields = {
+            k: [a_map[item_id].get(k), b_map[item_id].get(k)]
+            for k in a_map[item_id].keys() | b_map[item_id].keys()
+            if a_map[item_id].get(k) != b_map[item_id].get(k)
+        }
+        if fields: changed[item_id] = fields
+
+    return {
+        f"only_{a_name}": sorted(a_map.keys() - b_map.keys()),
+        f"only_{b_name}": sorted(b_map.keys() - a_map.keys()),
+        "changed": dict(sorted(changed.items())),
+    }
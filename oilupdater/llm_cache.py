@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# On-disk, content-addressed cache for LLM responses.
+# One JSON file per key under <root>/<2 hex chars>/<key>.json; least recently
+# used files are evicted once the directory grows past max_bytes.
+
+CACHE_DIR = ".llm_cache"
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def normalize_prompt(text):
+    # Whitespace-only prompt edits must not invalidate the cache
+    return " ".join(text.split())
+
+
+def content_key(*parts):
+    """Stable sha256 over JSON-serializable parts."""
+    blob = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+        # Sized before the write, so a first put's rescan doesn't count the new file twice
+        size = self.size()
+        old = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        self._size = size + len(data) - old
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def size(self):
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.root.glob("*/*.json"))
+        return self._size
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        files = sorted(
+            ((p.stat().st_mtime, p.stat().st_size, p) for p in self.root.glob("*/*.json")),
+            key=lambda f: f[0]
+        )
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
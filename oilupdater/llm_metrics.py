@@ -0,0 +1,178 @@
+import json
+import time
+import uuid
+import argparse
+from datetime import datetime, timezone
+
+# Per-call metrics for the LLM stages: one JSON line per API call (latency,
+# token usage, outcome) and one per run (totals, settings), appended to
+# METRICS_FILE. report() turns the records of a run into p50/p95 latency,
+# tokens per product, cache hits, retries and an estimated cost.
+
+METRICS_FILE = "enrich.metrics.jsonl"
+
+# USD per 1M tokens (deepseek-chat list price; update when it changes).
+# DeepSeek reports prompt tokens served from its context cache separately.
+PRICES = {"input": 0.28, "input_cached": 0.028, "output": 0.42}
+
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0..100) of a list of numbers."""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def token_usage(response):
+    """Token counts of a chat completion response (zeros when the API sent none)."""
+    usage = getattr(response, "usage", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+        # DeepSeek's context cache; other OpenAI-compatible APIs just leave it out
+        "cached_tokens": getattr(usage, "prompt_cache_hit_tokens", None) or 0,
+    }
+
+
+def cost(prompt_tokens, completion_tokens, cached_tokens=0, prices=PRICES):
+    return (
+        (prompt_tokens - cached_tokens) * prices["input"]
+        + cached_tokens * prices["input_cached"]
+        + completion_tokens * prices["output"]
+    ) / 1_000_000
+
+
+class MetricsLog:
+    """Collects the records of one run and appends them to a JSONL file.
+    path=None keeps them in memory only (the end-of-run report still works)."""
+
+    def __init__(self, path=METRICS_FILE, **settings):
+        self.path = path
+        self.run = uuid.uuid4().hex[:12]
+        self.settings = settings  # model, concurrency, batch size, ...
+        self.calls = []
+        self.started = time.perf_counter()
+
+    def _write(self, record):
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def call(self, kind, items, seconds, response=None, error=None, replayed=False):
+        """One API call. kind: "single" / "batch" / "reask"; replayed: answered by a cassette."""
+        record = {
+            "type": "call", "run": self.run, "time": now_iso(), "kind": kind,
+            "items": [item.get("itemNo") for item in items],
+            "ms": round(seconds * 1000, 1),
+            **token_usage(response),
+            "status": "ok" if error is None else "error",
+        }
+        if replayed:
+            record["replayed"] = True
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"[:300]
+        self.calls.append(record)
+        self._write(record)
+        return record
+
+    def finish(self, products, **counts):
+        """Writes the run record and returns the summary.
+        counts: things that are not API calls (cache_hits, retries, repaired, ...)."""
+        summary = summarize(self.calls, products, counts, time.perf_counter() - self.started)
+        self._write({"type": "run", "run": self.run, "time": now_iso(), **self.settings, **summary})
+        return summary
+
+
+def summarize(calls, products, counts=None, seconds=None, prices=PRICES):
+    # Replayed calls never reached the API: no latency, tokens or cost to report
+    replayed = [c for c in calls if c.get("replayed")]
+    calls = [c for c in calls if not c.get("replayed")]
+    ok = [c for c in calls if c["status"] == "ok"]
+    latencies = [c["ms"] for c in ok]
+    tokens = {k: sum(c[k] for c in ok) for k in ("prompt_tokens", "completion_tokens", "cached_tokens")}
+    summary = {
+        "calls": len(calls),
+        "errors": len(calls) - len(ok),
+        "replayed": len(replayed),
+        "products": products,
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "max_ms": max(latencies) if latencies else None,
+        **tokens,
+        "tokens_per_product": round((tokens["prompt_tokens"] + tokens["completion_tokens"]) / products)
+        if products else None,
+        "cost_usd": round(cost(**tokens, prices=prices), 4),
+        **(counts or {}),
+    }
+    if seconds is not None:
+        summary["seconds"] = round(seconds, 2)
+        summary["products_per_min"] = round(products / seconds * 60, 1) if products and seconds > 0 else None
+    return summary
+
+
+def report(summary, title="LLM METRICS"):
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+    print(f"API calls:               {summary['calls']} ({summary['errors']} failed)")
+    if summary.get("replayed"):
+        print(f"Replayed from cassette:  {summary['replayed']} (not sent)")
+    if summary.get("p50_ms") is not None:
+        print(f"Latency p50 / p95 / max: {summary['p50_ms']:.0f} / {summary['p95_ms']:.0f} / "
+              f"{summary['max_ms']:.0f} ms")
+    if summary.get("tokens_per_product") is not None:
+        print(f"Tokens / product:        {summary['tokens_per_product']} "
+              f"({summary['prompt_tokens']} in, {summary['completion_tokens']} out, "
+              f"{summary['cached_tokens']} in from API cache)")
+    print(f"Cache hits (local):      {summary.get('cache_hits', 0)}")
+    print(f"Retries:                 {summary.get('retries', 0)}")
+    print(f"Estimated cost:          ${summary['cost_usd']:.4f}")
+    if summary.get("products_per_min") is not None:
+        print(f"Throughput:              {summary['products_per_min']} products/min "
+              f"({summary['seconds']}s wall)")
+    print("=" * 60)
+
+
+def load(path=METRICS_FILE):
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # torn last line of a crashed run
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report LLM call metrics from a metrics log")
+    parser.add_argument("file", nargs="?", default=METRICS_FILE)
+    parser.add_argument("--run", default=None, help="run id (default: the last run)")
+    parser.add_argument("--runs", action="store_true", help="one line per run instead")
+    args = parser.parse_args()
+
+    records = load(args.file)
+    runs = [r for r in records if r.get("type") == "run"]
+    if args.runs:
+        for r in runs:
+            print(f"{r['time']}  {r['run']}  calls={r['calls']:<4} products={r['products']:<4} "
+                  f"p50={r['p50_ms'] or '-'}ms p95={r['p95_ms'] or '-'}ms "
+                  f"tok/product={r['tokens_per_product'] or '-'} cache={r.get('cache_hits', 0)} replayed={r.get('replayed', 0)} "
+                  f"${r['cost_usd']:.4f}  concurrency={r.get('concurrency')} batch={r.get('batch_size')}")
+    else:
+        run = args.run or (runs[-1]["run"] if runs else records[-1]["run"] if records else None)
+        calls = [r for r in records if r.get("type") == "call" and r["run"] == run]
+        finished = next((r for r in runs if r["run"] == run), None)
+        if finished:
+            report(finished, f"LLM METRICS (run {run})")
+        else:  # interrupted run: rebuild what can be rebuilt from its calls
+            report(summarize(calls, len({i for c in calls if c["status"] == "ok" for i in c["items"]})),
+                   f"LLM METRICS (run {run}, unfinished)")
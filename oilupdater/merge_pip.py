@@ -0,0 +1,133 @@
+import json
+import argparse
+
+from . import delta_feed
+from .journal import write_json_array_atomic
+
+PATCH_FILE = "PIP.patch.json"  # RFC 6902 JSON Patch of the last merge
+
+def pointer(*parts):
+    # RFC 6901 JSON Pointer: "~" -> "~0", "/" -> "~1"
+    return "".join("/" + str(p).replace("~", "~0").replace("/", "~1") for p in parts)
+
+def diff_pip(encyclopedia, pip_map):
+    """Field-level diff of PIP links. Returns (patch, report) where patch is a list of
+    RFC 6902 operations (a "test" guards every replaced value) and report holds the
+    unchanged / updated / missing itemNos."""
+    patch = []
+    report = {"unchanged": [], "updated": [], "missing": []}
+
+    for i, item in enumerate(encyclopedia):
+        if not isinstance(item, dict):
+            continue
+        item_no = item.get("itemNo")
+
+        if item_no not in pip_map:
+            report["missing"].append(item_no)
+            continue
+
+        new_pip = pip_map[item_no]
+        refs = item.get("references")
+
+        if "references" not in item:
+            patch.append({"op": "add", "path": pointer(i, "references"), "value": {"PIP": new_pip}})
+        elif not isinstance(refs, dict):
+            patch.append({"op": "test", "path": pointer(i, "references"), "value": refs})
+            patch.append({"op": "replace", "path": pointer(i, "references"), "value": {"PIP": new_pip}})
+        elif "PIP" not in refs:
+            patch.append({"op": "add", "path": pointer(i, "references", "PIP"), "value": new_pip})
+        elif refs["PIP"] != new_pip:
+            patch.append({"op": "test", "path": pointer(i, "references", "PIP"), "value": refs["PIP"]})
+            patch.append({"op": "replace", "path": pointer(i, "references", "PIP"), "value": new_pip})
+        else:
+            report["unchanged"].append(item_no)
+            continue
+
+        report["updated"].append(item_no)
+
+    return patch, report
+
+def apply_patch(doc, patch):
+    """Applies add / replace / test operations in place (the subset diff_pip emits)."""
+    for op in patch:
+        parts = [p.replace("~1", "/").replace("~0", "~") for p in op["path"].split("/")[1:]]
+        parent = doc
+        for p in parts[:-1]:
+            parent = parent[int(p)] if isinstance(parent, list) else parent[p]
+        key = int(parts[-1]) if isinstance(parent, list) else parts[-1]
+
+        if op["op"] == "test":
+            if parent[key] != op["value"]:
+                raise ValueError(f"JSON Patch test failed at {op['path']}")
+        elif op["op"] in ("add", "replace"):
+            parent[key] = op["value"]
+        else:
+            raise ValueError(f"Unsupported JSON Patch op: {op['op']}")
+    return doc
+
+def merge_pip_into_encyclopedia(
+    encyclopedia_path="encyclopedia.json",
+    pip_path="PIP.json",
+    output_path="encyclopedia.json",
+    patch_path=PATCH_FILE,
+    dry_run=False
+):
+    with open(encyclopedia_path, "r", encoding="utf-8") as f:
+        encyclopedia = json.load(f)
+
+    with open(pip_path, "r", encoding="utf-8") as f:
+        pip_list = json.load(f)
+
+    # build lookup: id -> pip link
+    pip_map = {item["id"]: item["pip"] for item in pip_list}
+
+    patch, report = diff_pip(encyclopedia, pip_map)
+
+    # Only touch the files when at least one link actually changed
+    written = False
+    if patch and not dry_run:
+        apply_patch(encyclopedia, patch)
+        with delta_feed.track(output_path):
+            write_json_array_atomic(output_path, encyclopedia)
+        written = True
+
+    if patch_path and not dry_run:
+        write_json_array_atomic(patch_path, patch)
+
+    print("=" * 50)
+    print("PIP MERGE SUMMARY")
+    print("=" * 50)
+    print(f"Total encyclopedia entries: {len(encyclopedia)}")
+    print(f"PIP links unchanged:       {len(report['unchanged'])}")
+    print(f"PIP links updated:         {len(report['updated'])}")
+    print(f"Missing PIP entries:       {len(report['missing'])}")
+    if report["updated"]:
+        print(f"  -> Updated: {', '.join(map(str, report['updated'][:5]))}"
+              + (f" ...and {len(report['updated']) - 5} more" if len(report['updated']) > 5 else ""))
+    if dry_run:
+        print("Dry run: nothing written.")
+    elif written:
+        print(f"Written: {output_path} (+ JSON Patch: {patch_path})")
+    else:
+        print(f"{output_path} already up to date, not rewritten.")
+    print("=" * 50)
+    print("Done.")
+
+    return patch, report
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Merge verified PIP links from PIP.json into encyclopedia.json")
+    parser.add_argument("--encyclopedia", default="encyclopedia.json")
+    parser.add_argument("--pip", default="PIP.json")
+    parser.add_argument("--output", default=None, help="defaults to --encyclopedia")
+    parser.add_argument("--patch", default=PATCH_FILE, help="where to write the RFC 6902 patch ('' to skip)")
+    parser.add_argument("--dry-run", action="store_true", help="report and print the patch, write nothing")
+    args = parser.parse_args(argv)
+
+    patch, _ = merge_pip_into_encyclopedia(args.encyclopedia, args.pip, args.output or args.encyclopedia,
+                                           args.patch, args.dry_run)
+    if args.dry_run:
+        print(json.dumps(patch, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    cli()
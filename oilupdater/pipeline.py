@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import importlib
+from datetime import datetime, timezone
+
+# Pipeline orchestrator: runs the stages of the oilupdater package in order
+#
+#   scrape (1) -> enrich (2) -> pip (4) -> merge (3) -> publish (5)
+#
+# Each stage is fingerprinted from its input files, its code and the options
+# that change its result. A stage whose fingerprint matches the last successful
+# run (and whose outputs exist) is skipped. The stages form a chain (each one
+# reads what the one before wrote), so they run one after another; a failed
+# stage blocks the stages that depend on it.
+
+STATE_FILE = ".pipeline_state.json"
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class Stage:
+    def __init__(self, name, module, run, inputs=(), outputs=(), code=(), deps=(), always=False, complete=None):
+        self.name = name
+        self.module = module    # oilupdater module that implements the stage
+        self.script = module.rsplit(".", 1)[-1] + ".py"  # its source, part of the fingerprint
+        self.run = run          # run(module, options) -> None
+        self.inputs = inputs    # files whose content decides the result
+        self.outputs = outputs  # files that must exist for a skip
+        self.code = code        # helper modules besides the script (files in the package)
+        self.deps = deps
+        self.always = always    # remote input (the PDF): cannot be hashed here, always run
+        self.complete = complete  # complete(result of run) -> False: outputs written, but not up to date
+
+STAGES = [
+    Stage("scrape", "oilupdater.scrape",
+          lambda m, o: m.run_scraper(workers=o["workers"], url=o["url"] or m.PDF_URL, engine=o["engine"]),
+          outputs=("doterra_products.json",),
+          code=("row_classifier.py", "layout_extractor.py", "price_history.py", "delta_feed.py"),
+          always=True),  # cheap when unchanged: conditional GET + parse cache
+    Stage("enrich", "oilupdater.enrich",
+          lambda m, o: m.main(concurrency=o["concurrency"], batch_size=o["batch_size"]),
+          inputs=("doterra_products.json", "encyclopedia.json"),  # existing entries decide what is kept
+          outputs=("encyclopedia.json",),
+          code=("ratelimit.py", "llm_cache.py", "journal.py", "delta_feed.py", "entry_schema.py", "backfill.py",
+                "llm_metrics.py", "cassette.py"),
+          deps=("scrape",),
+          complete=lambda counts: not counts["failed"]),  # failed products are retried on the next run
+    Stage("pip", "oilupdater.generate_pip",
+          lambda m, o: m.generate_pip_file(),
+          inputs=("encyclopedia.json",), outputs=("PIP.json",),
+          deps=("enrich",)),
+    Stage("merge", "oilupdater.merge_pip",
+          lambda m, o: m.merge_pip_into_encyclopedia(),
+          inputs=("encyclopedia.json", "PIP.json"), outputs=("encyclopedia.json",),
+          code=("delta_feed.py",), deps=("pip",)),
+    Stage("publish", "oilupdater.publish",
+          lambda m, o: m.publish(shards=o["shards"]),
+          inputs=("doterra_products.json", "encyclopedia.json"), outputs=("publish/manifest.json",),
+          deps=("merge",)),
+]
+
+# Options that change a stage's result (the rest, like concurrency, only change speed)
+FINGERPRINT_OPTIONS = {"scrape": ("url", "engine"), "publish": ("shards",)}
+
+def file_hash(path):
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fingerprint(stage, options):
+    parts = {
+        "inputs": {p: file_hash(p) for p in stage.inputs},
+        "code": {p: file_hash(os.path.join(PACKAGE_DIR, p)) for p in (stage.script, *stage.code)},
+        "options": {k: options[k] for k in FINGERPRINT_OPTIONS.get(stage.name, ())},
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+def is_current(stage, state, options):
+    if stage.always:
+        return False
+    record = state.get(stage.name)
+    return (record is not None
+            and record.get("fingerprint") == fingerprint(stage, options)
+            and all(os.path.exists(p) for p in stage.outputs))
+
+def run_stage(stage, options):
+    start = time.perf_counter()
+    # Imported only when the stage actually runs (a dry run or an all-skipped run imports none)
+    result = stage.run(importlib.import_module(stage.module), options)
+    return time.perf_counter() - start, result
+
+def run_pipeline(options, force=(), only=None, dry_run=False, state_path=STATE_FILE):
+    """Runs every stage that is not up to date, in order.
+    Returns {stage: "ran" | "partial" | "skipped" | "failed" | "blocked"}."""
+    stages = [s for s in STAGES if only is None or s.name in only]
+    selected = {s.name for s in stages}
+    state = load_state(state_path)
+    status = {}
+
+    if dry_run:
+        for stage in stages:
+            current = stage.name not in force and is_current(stage, state, options)
+            print(f"{stage.name:8} {'up to date' if current else 'would run'}")
+        return {}
+
+    for stage in stages:
+        name = stage.name
+        if any(status.get(d) in ("failed", "blocked") for d in stage.deps if d in selected):
+            status[name] = "blocked"
+            continue
+        if name not in force and is_current(stage, state, options):
+            status[name] = "skipped"
+            print(f"[pipeline] {name}: up to date, skipped")
+            continue
+
+        print(f"[pipeline] {name}: running {stage.module}")
+        try:
+            elapsed, result = run_stage(stage, options)
+        except (Exception, SystemExit) as e:  # SystemExit from a script counts as a failure too
+            status[name] = "failed"
+            print(f"[pipeline] {name}: FAILED ({e})")
+            continue
+        if stage.complete is not None and not stage.complete(result):
+            # Later stages still run on what was written, but this one is not
+            # recorded as up to date, so the next run tries again
+            status[name] = "partial"
+            print(f"[pipeline] {name}: done in {elapsed:.1f}s, incomplete (runs again next time)")
+            continue
+        status[name] = "ran"
+        # Recorded after the run: the inputs as they are now are the ones the
+        # outputs are current for (merge, for one, rewrites its own input)
+        state[name] = {
+            "fingerprint": fingerprint(stage, options),
+            "finished": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "seconds": round(elapsed, 3),
+        }
+        save_state(state, state_path)
+        print(f"[pipeline] {name}: done in {elapsed:.1f}s")
+
+    print("=" * 50)
+    print("PIPELINE SUMMARY")
+    print("=" * 50)
+    for stage in stages:
+        print(f"{stage.name:8} {status.get(stage.name, 'blocked')}")
+    print("=" * 50)
+    return status
+
+def cli(argv=None, prog=None):
+    names = [s.name for s in STAGES]
+    parser = argparse.ArgumentParser(prog=prog, description="Run the scrape -> enrich -> PIP -> merge -> publish pipeline")
+    parser.add_argument("--only", nargs="+", choices=names, help="run just these stages")
+    parser.add_argument("--force", nargs="*", choices=names,
+                        help="run these stages even if up to date (no names = all)")
+    parser.add_argument("--dry-run", action="store_true", help="only show which stages would run")
+    parser.add_argument("--url", default=None, help="price-list PDF (default: the scraper's PDF_URL)")
+    parser.add_argument("--workers", type=int, default=1, help="scraper page-parsing processes")
+    parser.add_argument("--engine", default="text", help="scraper engine (text / layout)")
+    parser.add_argument("--concurrency", type=int, default=1, help="enrichment requests in flight")
+    parser.add_argument("--batch-size", type=int, default=1, help="products per enrichment request")
+    parser.add_argument("--shards", action="store_true", help="publish per-itemNo encyclopedia shards")
+    args = parser.parse_args(argv)
+
+    force = names if args.force == [] else (args.force or [])
+    options = {"url": args.url, "workers": args.workers, "engine": args.engine, "concurrency": args.concurrency,
+               "batch_size": args.batch_size, "shards": args.shards}
+    status = run_pipeline(options, force=force, only=args.only, dry_run=args.dry_run)
+    sys.exit(1 if any(s in ("failed", "blocked") for s in status.values()) else 0)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,182 @@
+import sqlite3
+import json
+import argparse
+from datetime import datetime, timezone
+
+# Price history: every scrape is appended as a run; prices are keyed by
+# (run_id, item_no) with a secondary (item_no, run_id) index, so per-product
+# series and run-to-run diffs are index lookups / joins, not file rebuilds.
+
+DB_FILE = "price_history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY,
+    scraped_at  TEXT NOT NULL,
+    market      TEXT NOT NULL DEFAULT 'hk',
+    currency    TEXT NOT NULL DEFAULT 'HKD',
+    source      TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_market_time ON runs (market, scraped_at);
+
+CREATE TABLE IF NOT EXISTS prices (
+    run_id   INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    item_no  TEXT NOT NULL,
+    name     TEXT,
+    name_cn  TEXT,
+    size     TEXT,
+    unit     TEXT,
+    type     TEXT,
+    retail   REAL,
+    member   REAL,
+    PRIMARY KEY (run_id, item_no)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_item_run ON prices (item_no, run_id);
+"""
+
+def now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def connect(path=DB_FILE):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+def record_run(conn, products, market="hk", currency="HKD", scraped_at=None, source=None, skip_unchanged=False):
+    """Appends one scrape; returns its run_id. Duplicate itemNos keep the first row.
+    With skip_unchanged, a scrape identical to the market's latest run is not kept
+    and None is returned: the history only grows when something changed."""
+    cur = currency.lower()
+    retail_key, member_key = f"retail_{cur}", f"member_{cur}"
+    with conn:
+        _, latest = last_two_runs(conn, market)
+        run_id = conn.execute(
+            "INSERT INTO runs (scraped_at, market, currency, source) VALUES (?, ?, ?, ?)",
+            (scraped_at or now(), market, currency.upper(), source)
+        ).lastrowid
+        conn.executemany(
+            "INSERT OR IGNORE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (run_id, p["itemNo"], p.get("name"), p.get("nameCN"), p.get("size"),
+                 p.get("unit"), p.get("type"), p.get(retail_key), p.get(member_key))
+                for p in products
+            ]
+        )
+        # Compared in SQL after the insert, so both sides went through the same column affinities
+        if skip_unchanged and latest is not None and same_rows(conn, latest, run_id):
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))  # cascades to its prices
+            return None
+    return run_id
+
+def same_rows(conn, run_a, run_b):
+    """True if two runs recorded exactly the same items, names and prices."""
+    columns = "item_no, name, name_cn, size, unit, type, retail, member"
+    for first, second in ((run_a, run_b), (run_b, run_a)):
+        if conn.execute(
+            f"""SELECT 1 FROM (SELECT {columns} FROM prices WHERE run_id = ?
+                               EXCEPT SELECT {columns} FROM prices WHERE run_id = ?) LIMIT 1""",
+            (first, second)
+        ).fetchone():
+            return False
+    return True
+
+# ---------- QUERIES ----------
+
+def list_runs(conn, market="hk", limit=-1):
+    return [dict(row) for row in conn.execute(
+        """SELECT r.run_id, r.scraped_at, r.source,
+                  (SELECT COUNT(*) FROM prices p WHERE p.run_id = r.run_id) AS items
+           FROM runs r WHERE r.market = ?
+           ORDER BY r.scraped_at DESC, r.run_id DESC LIMIT ?""",
+        (market, limit)
+    )]
+
+def last_two_runs(conn, market="hk"):
+    """(previous_run_id, latest_run_id); previous is None with fewer than two runs."""
+    runs = [row[0] for row in conn.execute(
+        "SELECT run_id FROM runs WHERE market = ? ORDER BY scraped_at DESC, run_id DESC LIMIT 2",
+        (market,)
+    )]
+    if not runs: return None, None
+    return (runs[1] if len(runs) > 1 else None), runs[0]
+
+def price_series(conn, item_no, market="hk"):
+    return [dict(row) for row in conn.execute(
+        """SELECT r.scraped_at, p.retail, p.member
+           FROM prices p JOIN runs r ON r.run_id = p.run_id
+           WHERE p.item_no = ? AND r.market = ?
+           ORDER BY r.scraped_at, r.run_id""",
+        (item_no, market)
+    )]
+
+def added_items(conn, old_run, new_run):
+    return [dict(row) for row in conn.execute(
+        """SELECT n.item_no, n.name FROM prices n
+           LEFT JOIN prices o ON o.run_id = ? AND o.item_no = n.item_no
+           WHERE n.run_id = ? AND o.item_no IS NULL ORDER BY n.item_no""",
+        (old_run, new_run)
+    )]
+
+def removed_items(conn, old_run, new_run):
+    return added_items(conn, new_run, old_run)
+
+def biggest_movers(conn, old_run, new_run, limit=10, field="member"):
+    """Items present in both runs whose `field` price changed, largest % move first."""
+    if field not in ("retail", "member"): raise ValueError(f"Unknown price field: {field}")
+    return [dict(row) for row in conn.execute(
+        f"""SELECT n.item_no, n.name, o.{field} AS old_price, n.{field} AS new_price,
+                   (n.{field} - o.{field}) * 100.0 / o.{field} AS pct
+            FROM prices n JOIN prices o ON o.run_id = ? AND o.item_no = n.item_no
+            WHERE n.run_id = ? AND o.{field} > 0 AND n.{field} != o.{field}
+            ORDER BY ABS(pct) DESC, n.item_no LIMIT ?""",
+        (old_run, new_run, limit)
+    )]
+
+def diff_runs(conn, old_run, new_run):
+    return {
+        "added": added_items(conn, old_run, new_run),
+        "removed": removed_items(conn, old_run, new_run),
+        "changed": biggest_movers(conn, old_run, new_run, limit=-1),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the scraped price history")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--market", default="hk")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("runs", help="list recorded scrapes")
+    series = sub.add_parser("series", help="price series of one product")
+    series.add_argument("item_no")
+    for name in ("movers", "diff"):
+        p = sub.add_parser(name, help="biggest price movers" if name == "movers" else "added / removed / changed items")
+        p.add_argument("--from", dest="old_run", type=int, help="run_id (default: second latest)")
+        p.add_argument("--to", dest="new_run", type=int, help="run_id (default: latest)")
+        p.add_argument("--limit", type=int, default=10)
+    imp = sub.add_parser("import", help="record an existing products JSON file as a run")
+    imp.add_argument("file")
+    imp.add_argument("--at", help="scrape timestamp (default: now)")
+    imp.add_argument("--currency", default="HKD")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "runs":
+        result = list_runs(conn, args.market)
+    elif args.command == "series":
+        result = price_series(conn, args.item_no, args.market)
+    elif args.command == "import":
+        with open(args.file, "r", encoding="utf-8") as f:
+            result = {"run_id": record_run(conn, json.load(f), args.market, args.currency, args.at, args.file)}
+    else:
+        prev, latest = last_two_runs(conn, args.market)
+        old_run = args.old_run or prev
+        new_run = args.new_run or latest
+        if old_run is None or new_run is None:
+            raise SystemExit("Need at least two runs to compare.")
+        if args.command == "movers":
+            result = biggest_movers(conn, old_run, new_run, args.limit)
+        else:
+            result = diff_runs(conn, old_run, new_run)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
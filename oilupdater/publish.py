@@ -0,0 +1,181 @@
+import json
+import os
+import re
+import gzip
+import hashlib
+import argparse
+
+try:
+    import brotli  # pip install brotli
+except ImportError:
+    brotli = None
+
+# Configuration
+PRODUCTS_FILE = "doterra_products.json"
+ENCYCLOPEDIA_FILE = "encyclopedia.json"
+PUBLISH_DIR = "publish"
+MANIFEST_FILE = "manifest.json"
+SHARD_DIR = "encyclopedia"  # publish/encyclopedia/<itemNo>.json + index.json
+SHARD_INDEX = "index.json"
+
+BENEFITS = ("sleep", "stress", "mood", "pain", "skin", "digestive", "energy", "respiratory", "immune", "focus")
+
+def minify(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def calculator_projection(encyclopedia, products):
+    """Slim rows for the oil calculator: identity, size, prices and benefit scores only."""
+    names_cn = {}
+    for p in products:
+        names_cn.setdefault(p.get("itemNo"), p.get("nameCN"))
+
+    rows = []
+    for entry in encyclopedia:
+        if not isinstance(entry, dict):
+            continue
+        benefits = entry.get("generalBenefits") or {}
+        rows.append({
+            "itemNo": entry.get("itemNo"),
+            "name": entry.get("name"),
+            "nameCN": names_cn.get(entry.get("itemNo")),
+            "size": entry.get("size"),
+            "unit": entry.get("unit"),
+            "prices": entry.get("prices"),
+            "scores": {b: (benefits.get(b) or {}).get("score") for b in BENEFITS},
+        })
+    return rows
+
+def write_if_changed(path, data):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+def publish_artifact(name, data, out_dir):
+    """Writes name (minified) plus .gz / .br variants; returns its manifest entry."""
+    variants = {name: data, name + ".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[name + ".br"] = brotli.compress(data, quality=11)
+
+    changed = False
+    for file_name, blob in variants.items():
+        changed |= write_if_changed(os.path.join(out_dir, file_name), blob)
+
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "bytes": len(data),
+        "encodings": {
+            ("gzip" if f.endswith(".gz") else "br"): {"file": f, "bytes": len(b)}
+            for f, b in variants.items() if f != name
+        },
+    }, changed
+
+def write_shards(encyclopedia, out_dir):
+    """One minified file per itemNo plus an index (name, category, sha256, bytes).
+    Only shards whose bytes changed are rewritten; shards of removed items are deleted.
+    Returns (index, changed itemNos, removed itemNos)."""
+    shard_dir = os.path.join(out_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    index, changed = {}, []
+    for entry in encyclopedia:
+        if not isinstance(entry, dict):
+            continue
+        item_no = str(entry.get("itemNo", ""))
+        if not re.match(r'^[\w-]+$', item_no) or item_no in index:
+            continue  # unusable as a file name, or duplicate (first one wins)
+
+        data = minify(entry)
+        file_name = f"{item_no}.json"
+        if write_if_changed(os.path.join(shard_dir, file_name), data):
+            changed.append(item_no)
+        index[item_no] = {
+            "name": entry.get("name"),
+            "category": entry.get("category"),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "bytes": len(data),
+            "file": f"{SHARD_DIR}/{file_name}",
+        }
+
+    removed = []
+    for file_name in sorted(os.listdir(shard_dir)):
+        item_no, ext = os.path.splitext(file_name)
+        if ext == ".json" and file_name != SHARD_INDEX and item_no not in index:
+            os.remove(os.path.join(shard_dir, file_name))
+            removed.append(item_no)
+
+    return index, changed, removed
+
+def publish(products_file=PRODUCTS_FILE, encyclopedia_file=ENCYCLOPEDIA_FILE, out_dir=PUBLISH_DIR, shards=False):
+    # 1. Load the pipeline outputs
+    with open(products_file, "r", encoding="utf-8") as f:
+        products = json.load(f)
+    with open(encyclopedia_file, "r", encoding="utf-8") as f:
+        encyclopedia = json.load(f)
+
+    # 2. Build the artifacts (minified JSON)
+    artifacts = {
+        "doterra_products.min.json": (minify(products), products_file),
+        "encyclopedia.min.json": (minify(encyclopedia), encyclopedia_file),
+        "calculator.min.json": (minify(calculator_projection(encyclopedia, products)),
+                                f"{encyclopedia_file} + {products_file}"),
+    }
+
+    # 3. Write files + precompressed variants, only where content changed
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"files": {}}
+    changed = []
+    for name, (data, source) in artifacts.items():
+        entry, was_changed = publish_artifact(name, data, out_dir)
+        entry["source"] = source
+        manifest["files"][name] = entry
+        if was_changed:
+            changed.append(name)
+
+    # 3b. Optional per-product shards; the index itself is published like any artifact
+    if shards:
+        index, changed_shards, removed_shards = write_shards(encyclopedia, out_dir)
+        index_name = f"{SHARD_DIR}/{SHARD_INDEX}"
+        entry, was_changed = publish_artifact(index_name, minify(index), out_dir)
+        entry["source"] = encyclopedia_file
+        manifest["files"][index_name] = entry
+        if was_changed:
+            changed.append(index_name)
+
+    if write_if_changed(os.path.join(out_dir, MANIFEST_FILE),
+                        json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")):
+        changed.append(MANIFEST_FILE)
+
+    # 4. Report
+    print("=" * 60)
+    print("PUBLISH SUMMARY")
+    print("=" * 60)
+    sources = {products_file: os.path.getsize(products_file), encyclopedia_file: os.path.getsize(encyclopedia_file)}
+    for name, entry in manifest["files"].items():
+        sizes = ", ".join(f"{enc} {e['bytes'] / 1024:.1f} KB" for enc, e in entry["encodings"].items())
+        print(f"{name:28} {entry['bytes'] / 1024:7.1f} KB  ({sizes})")
+    print(f"Raw sources:                 {sum(sources.values()) / 1024:7.1f} KB")
+    if brotli is None:
+        print("brotli not installed: .br variants skipped (pip install brotli)")
+    if shards:
+        print(f"Shards: {len(index)} ({len(changed_shards)} written, {len(removed_shards)} removed)")
+    print(f"Changed files: {', '.join(changed) if changed else 'none'}")
+    print("=" * 60)
+    return manifest
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Write minified, precompressed artifacts for the website")
+    parser.add_argument("--out", default=PUBLISH_DIR)
+    parser.add_argument("--shards", action="store_true",
+                        help=f"also write one file per itemNo + an index under <out>/{SHARD_DIR}/")
+    args = parser.parse_args(argv)
+
+    publish(out_dir=args.out, shards=args.shards)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,101 @@
+import random
+import threading
+import time
+
+# Shared rate limiting and retry helpers for the LLM stages.
+# (asyncio is imported inside the coroutines: the blocking helpers don't need it)
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token-bucket limiter: `rate` calls per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Take one token and return how long the caller must wait for it.
+        # Tokens may go negative, which queues callers fairly behind each other.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self):
+        import asyncio
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def status_of(exc):
+    """HTTP status carried by an API exception, or None."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def retry_after(exc):
+    """Seconds requested by a Retry-After header, or None."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    # "Full jitter": spreads retries of concurrent workers instead of syncing them
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def retry_async(call, is_retryable, retries=5, base=1.0, cap=30.0, on_retry=None):
+    """Await `call()` and retry retryable failures with exponential backoff + jitter."""
+    import asyncio
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= retries or not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = backoff_delay(attempt, base, cap)
+            if on_retry:
+                on_retry(e, attempt + 1, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def retry(call, is_retryable, retries=5, base=1.0, cap=30.0, on_retry=None):
+    """Blocking counterpart of retry_async()."""
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            if attempt >= retries or not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = backoff_delay(attempt, base, cap)
+            if on_retry:
+                on_retry(e, attempt + 1, delay)
+            time.sleep(delay)
+            attempt += 1
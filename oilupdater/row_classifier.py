@@ -0,0 +1,174 @@
+import re
+import json
+import time
+import argparse
+
+# Line classifier / tokenizer for the price-list text (hot loop of 1.oil_scraper.py).
+# All patterns are compiled once; the keyword filter is a single alternation and
+# the EN/CN boundary is found with one regex scan instead of a per-char loop.
+
+# Words to ignore if found in a non-product line
+ignored_keywords = ["Item No", "Product", "Wholesale", "Retail", "PV", "Unit", "LRP", "Point", "Redemption", "產品編號"]
+
+CORPUS_FILE = "benchmarks/fixtures/price_list_text.json"
+
+CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+PRODUCT_START_RE = re.compile(r'^\d{5,}')
+HAS_PRICE_RE = re.compile(r'[0-9]\.[0-9]{2}')  # same matches as [0-9]+\.[0-9]{2}, less backtracking
+IGNORED_RE = re.compile("|".join(re.escape(kw) for kw in ignored_keywords))
+
+PRICE_RE = re.compile(r'((?:\s+[0-9,]+\.\d{2}){2,4})$')
+ID_RE = re.compile(r'^(\d+)\s+(.*)')
+SIZE_RE = re.compile(r'(\d+)\s*([a-zA-Z\s/]+[\u4e00-\u9fff/]*.*)$')
+STRAY_DIGIT_RE = re.compile(r'\s+(\d+)$')
+UNIT_CN_RE = re.compile(r'^([\u4e00-\u9fff]+)')
+
+def is_chinese_char(char):
+    return u'\u4e00' <= char <= u'\u9fff'
+
+def split_bilingual_text(text):
+    """Splits text into English and Chinese parts."""
+    m = CJK_RE.search(text)
+    if m:
+        return text[:m.start()].strip(), text[m.start():].strip()
+    return text.strip(), ""
+
+def split_description(content):
+    """Splits "Name 名稱 5 mL/毫升" into (size, unit_str, name_str)."""
+    size_match = SIZE_RE.search(content)
+
+    size_val, unit_str, name_str = "1", "Count", content
+    if size_match:
+        size_val = size_match.group(1)
+        unit_str = size_match.group(2).strip()
+        name_str = content[:size_match.start()].strip()
+    return size_val, unit_str, name_str
+
+def build_product(item_id, size_val, unit_str, name_str, retail_raw, member_raw):
+    # Split Name
+    name_en, name_cn = split_bilingual_text(name_str)
+    if not name_en: name_en = name_str
+
+    # Clean Unit
+    unit_en, unit_cn = unit_str, ""
+    if "/" in unit_str:
+        parts = unit_str.split('/')
+        unit_en, unit_cn = parts[0].strip(), parts[1].strip()
+    elif unit_str and is_chinese_char(unit_str[-1]):
+        unit_en, unit_cn = split_bilingual_text(unit_str)
+
+    # Clean the Chinese unit of trailing garbage
+    unit_cn_match = UNIT_CN_RE.match(unit_cn)
+    if unit_cn_match: unit_cn = unit_cn_match.group(1)
+
+    return {
+        "itemNo": item_id,
+        "name": name_en,
+        "nameCN": name_cn,
+        "size": size_val,
+        "unit": unit_en,
+        "unitCN": unit_cn,
+        "retail_hkd": float(retail_raw),
+        "member_hkd": float(member_raw)
+    }
+
+def parse_row(line):
+    line = line.strip()
+
+    # 1. Price Regex (The robust "block" version)
+    price_match = PRICE_RE.search(line)
+
+    if not price_match: return None
+
+    prices = price_match.group(1).split()
+
+    retail_raw = prices[0].replace(',', '')
+    member_raw = prices[1].replace(',', '')
+
+    # 2. Leftover Content
+    leftover = line[:price_match.start()].strip()
+
+    # 3. ID and Name
+    id_match = ID_RE.match(leftover)
+    if not id_match: return None
+
+    item_id = id_match.group(1)
+    content = id_match.group(2).strip()
+
+    # 4. Size/Unit extraction
+    size_val, unit_str, name_str = split_description(content)
+
+    # 5. Fix "Stray Digits" (The '395' fix)
+    stray_digit_match = STRAY_DIGIT_RE.search(unit_str)
+    if stray_digit_match:
+        stray_digit = stray_digit_match.group(1)
+        retail_raw = stray_digit + retail_raw # Prepend missing digit to price
+        unit_str = unit_str[:stray_digit_match.start()].strip() # Remove from unit
+
+    # 6./7. Split Name, Clean Unit
+    return build_product(item_id, size_val, unit_str, name_str, retail_raw, member_raw)
+
+def classify_line(line):
+    """Returns ("product", data), ("header", (en, cn)) or None for one text line."""
+    line = line.strip()
+    if not line: return None
+
+    # CHECK 1: Is this a Product Line? (Starts with ID digits + contains prices)
+    if "." in line and PRODUCT_START_RE.match(line):
+        data = parse_row(line)
+        if data:
+            return "product", data
+
+    # CHECK 2: Is this a Category Header?
+    # It's NOT a product, NOT a price row, and NOT a table header keyword
+    elif not HAS_PRICE_RE.search(line) and not IGNORED_RE.search(line):
+        # Assume this line is a Category Header (e.g., "Single Oils 單方精油")
+        head_en, head_cn = split_bilingual_text(line)
+
+        # Basic validation: headers usually have letters
+        if len(head_en) > 2:
+            return "header", (head_en, head_cn)
+
+    return None
+
+def scan_text(text):
+    """All product/header events of one page, in reading order."""
+    if not text: return []
+    events = []
+    for line in text.split('\n'):
+        event = classify_line(line)
+        if event: events.append(event)
+    return events
+
+# ---------- BENCHMARK ----------
+
+def load_corpus(path=CORPUS_FILE):
+    """Page texts (JSON array in the shape of extract_text() results) as a flat list of lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        pages = json.load(f)
+    return [line for page in pages if page for line in page.split('\n')]
+
+def benchmark(lines, repeat=5):
+    """Best-of-`repeat` throughput of classify_line() in lines per second."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            classify_line(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best if best > 0 else float('inf')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the price-list line classifier")
+    parser.add_argument("corpus", nargs="?", default=CORPUS_FILE,
+                        help="JSON array of page texts (see 1.oil_scraper.py --record-text)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=20, help="repeat the corpus N times per run")
+    args = parser.parse_args()
+
+    lines = load_corpus(args.corpus) * args.scale
+    rate = benchmark(lines, args.repeat)
+    products = sum(1 for line in lines if (classify_line(line) or ("",))[0] == "product")
+    print(f"Lines:        {len(lines)}")
+    print(f"Products:     {products}")
+    print(f"Lines/second: {rate:,.0f}")
@@ -0,0 +1,472 @@
+import json
+import io
+import os
+import sys
+import argparse
+import hashlib
+from datetime import datetime, timezone
+
+from . import row_classifier
+from . import layout_extractor
+from . import price_history
+from . import delta_feed
+from .row_classifier import scan_text
+
+# pip install pdfplumber requests
+# (both are imported only when a PDF actually has to be fetched / parsed)
+# source code for DoTerra_Pricing_Tool.exe
+
+PDF_URL = "https://media.doterra.com/hk-otg/zh/brochures/hkotg-price-list.pdf"
+WORKERS = 1  # > 1 parses page ranges in a process pool
+OUTPUT_FILE = "doterra_products.json"
+CACHE_DIR = ".scraper_cache"  # downloaded PDF, HTTP validators and last parse
+ENGINE = "text"  # "text": regex over extract_text() lines, "layout": word coordinates -> columns
+ENGINES = ("text", "layout")
+DIFF_FILE = "engine_diff.json"
+MARKETS_FILE = "markets.json"       # market registry: code -> url, currency, output
+INDEX_FILE = "markets_index.json"   # combined index written by --markets
+HISTORY_DB = price_history.DB_FILE  # every scrape is appended here
+
+def stream_products(events, current_type_en="Uncategorized", current_type_cn=""):
+    """Stamps each product with the last Category Header seen before it.
+    Runs sequentially, so the header state carries across page (and worker) boundaries."""
+    for kind, value in events:
+        if kind == "header":
+            current_type_en, current_type_cn = value
+            # print(f"--- New Category Detected: {current_type_en} ---")
+        else:
+            # Inject the current Category Header we found previously
+            data = dict(value)
+            data['type'] = current_type_en
+            data['typeCN'] = current_type_cn
+
+            # Add a helper for your calculator
+            data['is_oil'] = True if "mL" in data['unit'] else False
+
+            yield data
+
+def apply_headers(events, current_type_en="Uncategorized", current_type_cn=""):
+    return list(stream_products(events, current_type_en, current_type_cn))
+
+def page_events(pages, engine=ENGINE, columns=None):
+    """Yields each page's events; a page's parsed objects are released once it is done.
+    `columns`: the layout engine's table columns carried over from earlier pages."""
+    if engine == "layout":
+        yield from layout_extractor.iter_page_events(pages, columns)
+        return
+    for page in pages:
+        text = page.extract_text()
+        if hasattr(page, "close"): page.close()
+        yield scan_text(text)
+
+def iter_products(pdf_bytes, engine=ENGINE):
+    """Streams products page by page, so memory stays bounded on long brochures."""
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        print(f"Scanning {len(pdf.pages)} pages ({engine} engine)...")
+        events = (event for page in page_events(pdf.pages, engine) for event in page)
+        yield from stream_products(events)
+
+def parse_pdf(pdf_bytes, workers=WORKERS, engine=ENGINE):
+    if workers > 1:
+        return apply_headers(scan_pdf(pdf_bytes, workers, engine))
+    return list(iter_products(pdf_bytes, engine))
+
+# ---------- PARALLEL PARSING ----------
+
+_worker_pdf = None
+
+def _init_worker(pdf_bytes):
+    import pdfplumber
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(io.BytesIO(pdf_bytes))
+
+def _scan_pages(start, end, engine):
+    # Runs in a worker process: (page index, events) for pages [start, end).
+    # The layout engine starts each range with the columns of the last table header
+    # before it, as the serial scan would, so the output is the same.
+    columns = layout_extractor.columns_before(_worker_pdf.pages, start) if engine == "layout" else None
+    return list(zip(range(start, end), page_events(_worker_pdf.pages[start:end], engine, columns)))
+
+def scan_pdf(pdf_bytes, workers=WORKERS, engine=ENGINE):
+    """Events of the whole PDF in page order, parsed by a process pool."""
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        page_count = len(pdf.pages)
+    print(f"Scanning {page_count} pages ({engine} engine, {workers} workers)...")
+    if not page_count: return []
+
+    # Small contiguous ranges: balanced load, few round trips
+    workers = min(workers, page_count)
+    chunk = max(1, page_count // (workers * 4))
+    ranges = [(i, min(i + chunk, page_count)) for i in range(0, page_count, chunk)]
+
+    from concurrent.futures import ProcessPoolExecutor
+    pages = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_bytes,)) as pool:
+        starts, ends = zip(*ranges)
+        for result in pool.map(_scan_pages, starts, ends, [engine] * len(ranges)):
+            pages.update(result)
+
+    events = []
+    for i in range(page_count):
+        events.extend(pages[i])
+    return events
+
+# ---------- DOWNLOAD + PARSE CACHE ----------
+
+def parser_fingerprint():
+    # Any edit to the scraper or its parsing modules invalidates cached parses
+    digest = hashlib.sha256()
+    for path in (__file__, row_classifier.__file__, layout_extractor.__file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def cache_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, key + '.pdf'), os.path.join(cache_dir, key + '.json')
+
+def load_meta(meta_path):
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_meta(meta_path, meta):
+    tmp = meta_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, meta_path)
+
+def fetch_pdf(url=PDF_URL, cache_dir=CACHE_DIR, session=None):
+    """Conditional GET of the price list. Returns (pdf_path, meta); meta holds the
+    ETag/Last-Modified validators and the sha256 of the cached PDF."""
+    os.makedirs(cache_dir, exist_ok=True)
+    pdf_path, meta_path = cache_paths(url, cache_dir)
+    meta = load_meta(meta_path)
+
+    headers = {}
+    if os.path.exists(pdf_path) and meta.get('sha256'):
+        if meta.get('etag'): headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'): headers['If-Modified-Since'] = meta['last_modified']
+
+    if session is None:
+        import requests
+        session = requests
+    response = session.get(url, headers=headers, timeout=60)
+    if response.status_code == 304:
+        print("PDF not modified (304), using cached copy.")
+        return pdf_path, meta
+
+    response.raise_for_status()
+    content = response.content
+    tmp = pdf_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, pdf_path)
+
+    meta.update({
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'sha256': hashlib.sha256(content).hexdigest(),
+    })
+    save_meta(meta_path, meta)
+    return pdf_path, meta
+
+def load_products(url=PDF_URL, workers=WORKERS, cache_dir=CACHE_DIR, session=None, engine=ENGINE, pool=None):
+    """Products of the current price list; reuses the last parse when the PDF hash
+    (and this parser) are unchanged, so a no-change refresh never touches pdfplumber.
+    With `pool` (a process pool shared by several markets) the parse runs there."""
+    pdf_path, meta = fetch_pdf(url, cache_dir, session)
+    fingerprint = parser_fingerprint() + ':' + engine
+
+    parsed = meta.get('parsed') or {}
+    if parsed.get('sha256') == meta['sha256'] and parsed.get('parser') == fingerprint:
+        print("PDF unchanged since last parse, reusing parsed products.")
+        return parsed['products']
+
+    with open(pdf_path, 'rb') as f:
+        pdf_bytes = f.read()
+    if pool is not None:
+        products = pool.submit(parse_pdf, pdf_bytes, 1, engine).result()
+    else:
+        products = parse_pdf(pdf_bytes, workers, engine)
+
+    meta['parsed'] = {'sha256': meta['sha256'], 'parser': fingerprint, 'products': products}
+    save_meta(cache_paths(url, cache_dir)[1], meta)
+    return products
+
+def record_text(url=PDF_URL, path=row_classifier.CORPUS_FILE, cache_dir=CACHE_DIR):
+    """Saves every page's extract_text() output as a benchmark corpus for oilupdater/row_classifier.py."""
+    import pdfplumber
+    pdf_path, _ = fetch_pdf(url, cache_dir)
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = [page.extract_text() for page in pdf.pages]
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(pages, f, ensure_ascii=False, indent=2)
+    print(f"Recorded {len(pages)} pages to {path}")
+
+def diff_engines(url=PDF_URL, workers=WORKERS, cache_dir=CACHE_DIR, path=DIFF_FILE):
+    """Parses the PDF with both engines and reports where their products differ."""
+    pdf_path, _ = fetch_pdf(url, cache_dir)
+    with open(pdf_path, 'rb') as f:
+        pdf_bytes = f.read()
+    results = {engine: parse_pdf(pdf_bytes, workers, engine) for engine in ENGINES}
+    report = layout_extractor.diff_products(results["text"], results["layout"])
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "="*50)
+    print(f"  ENGINE DIFF (text vs layout)")
+    print("="*50)
+    print(f"  Text engine products:    {len(results['text'])}")
+    print(f"  Layout engine products:  {len(results['layout'])}")
+    print(f"  Only in text:            {len(report['only_text'])}")
+    print(f"  Only in layout:          {len(report['only_layout'])}")
+    print(f"  Different fields:        {len(report['changed'])}")
+    for item_id, fields in list(report['changed'].items())[:5]:
+        print(f"    -> {item_id}: " + ", ".join(f"{k} {a!r} / {b!r}" for k, (a, b) in fields.items()))
+    print("="*50)
+    print(f"Full report: {path}")
+    return report
+
+def price_keys(currency="HKD"):
+    cur = currency.lower()
+    return f"retail_{cur}", f"member_{cur}"
+
+def localize_prices(products, currency="HKD"):
+    """Renames the parser's retail_hkd/member_hkd keys for markets in other currencies."""
+    if currency.upper() == "HKD": return products
+    retail_key, member_key = price_keys(currency)
+    renames = {"retail_hkd": retail_key, "member_hkd": member_key}
+    return [{renames.get(k, k): v for k, v in p.items()} for p in products]
+
+def save_products(products, filename=OUTPUT_FILE, currency="HKD", label=""):
+    """Compares against the previous file, saves it if anything changed and prints the summary."""
+    _, member_key = price_keys(currency)
+
+    # Open old JSON and compare, then save JSON
+    old_products = {}
+    old_list = None
+    
+    # 1. Load existing data if available
+    if os.path.exists(filename):
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                old_list = json.load(f)
+                # Convert list to dict (Key: ItemNo) for fast lookup
+                old_products = {p['itemNo']: p for p in old_list}
+        except Exception:
+            pass # File might be empty or corrupt, treat as fresh run
+
+    # 2. Analyze Changes
+    new_products_map = {p['itemNo']: p for p in products}
+    
+    added_items = []
+    changed_prices = [] # Stores percentage changes
+    removed_items = []
+
+    # Check for Added items and Price Changes
+    for pid, new_p in new_products_map.items():
+        if pid not in old_products:
+            added_items.append(new_p['name'])
+        else:
+            old_p = old_products[pid]
+            # Compare Member Price (Business relevant)
+            if old_p[member_key] != new_p[member_key]:
+                old_price = old_p[member_key]
+                new_price = new_p[member_key]
+                if old_price > 0:
+                    pct = ((new_price - old_price) / old_price) * 100
+                    changed_prices.append(pct)
+
+    # Check for Removed items
+    for pid, old_p in old_products.items():
+        if pid not in new_products_map:
+            removed_items.append(f"{old_p['name']} ({pid})")
+
+    # 3. Save NEW data to JSON (Overwriting old file, only if something changed)
+    if products != old_list:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(products, f, ensure_ascii=False, indent=2)
+        # Versioned delta so clients can sync without refetching the whole file
+        version = delta_feed.emit_delta(filename, old_list or [], products)
+        if version:
+            print(f"Delta feed: {delta_feed.feed_name(filename)} -> version {version}")
+    else:
+        print(f"{filename} is already up to date.")
+
+    # 4. Print Summary Report
+    print("\n" + "="*50)
+    print(f"  DATA REFRESH SUMMARY{' - ' + label if label else ''}")
+    print("="*50)
+    print(f"  Total Active Products:   {len(products)}")
+    print(f"  New Products Added:      {len(added_items)}")
+    print(f"  Products Removed:        {len(removed_items)}")
+    
+    if removed_items:
+        # Show first 3 removed items, then truncate
+        display_rem = removed_items[:3]
+        if len(removed_items) > 3: display_rem.append(f"...and {len(removed_items)-3} more")
+        print(f"    -> Gone: {', '.join(display_rem)}")
+
+    print(f"  Price Changes Detected:  {len(changed_prices)}")
+    
+    if changed_prices:
+        avg_change = sum(changed_prices) / len(changed_prices)
+        direction = "INCREASE" if avg_change > 0 else "DECREASE"
+        print(f"    -> Average Change:     {avg_change:+.2f}% ({direction})")
+    
+    print("="*50 + "\n")
+
+def record_history(products, market="hk", currency="HKD", source=None, db_path=HISTORY_DB):
+    """Appends this scrape to the SQLite price history and prints the biggest movers.
+    A scrape identical to the last recorded one adds nothing."""
+    if not db_path: return
+    conn = price_history.connect(db_path)
+    try:
+        run_id = price_history.record_run(conn, products, market, currency, source=source, skip_unchanged=True)
+        prev, latest = price_history.last_two_runs(conn, market)
+        movers = price_history.biggest_movers(conn, prev, run_id, limit=3) if prev and run_id else []
+    finally:
+        conn.close()
+
+    if run_id is None:
+        print(f"Price history: unchanged since run #{latest}, nothing recorded")
+        return
+    print(f"Price history: run #{run_id} recorded in {db_path}")
+    for m in movers:
+        print(f"    -> {m['name']} ({m['item_no']}): {m['old_price']:.2f} -> {m['new_price']:.2f} ({m['pct']:+.1f}%)")
+
+def run_scraper(workers=WORKERS, url=PDF_URL, filename=OUTPUT_FILE, cache_dir=CACHE_DIR, engine=ENGINE,
+                history_db=HISTORY_DB):
+    print("Fetching PDF...")
+    products = load_products(url, workers, cache_dir, engine=engine)
+
+    save_products(products, filename)
+    record_history(products, source=url, db_path=history_db)
+        
+    print(f"Success! Scraped {len(products)} products.")
+    # Show example of the "type" field working
+    if len(products) > 0:
+        print("\nSample Output:")
+        print(json.dumps(products[0], ensure_ascii=False, indent=2))
+
+# ---------- MULTI-MARKET ----------
+
+def load_markets(path=MARKETS_FILE):
+    """Market registry {code: {"url", "currency", "output"}}; defaults to the HK list."""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"hk": {"url": PDF_URL, "currency": "HKD", "output": OUTPUT_FILE}}
+
+def make_session(pool_size):
+    # One keep-alive connection pool shared by every market download
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def run_markets(codes=None, markets_file=MARKETS_FILE, cache_dir=CACHE_DIR, engine=ENGINE,
+                workers=None, index_file=INDEX_FILE, history_db=HISTORY_DB):
+    """Fetches and parses every selected market in parallel, then writes one product
+    file per market plus a combined index."""
+    markets = load_markets(markets_file)
+    codes = codes or list(markets)
+    unknown = [c for c in codes if c not in markets]
+    if unknown: raise ValueError(f"Unknown market(s): {', '.join(unknown)}")
+
+    print(f"Fetching {len(codes)} market(s): {', '.join(codes)}")
+    workers = workers or min(len(codes), os.cpu_count() or 1)
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    session = make_session(len(codes))
+    results, errors = {}, {}
+    try:
+        # Downloads overlap in threads; CPU-bound parsing goes to one shared process pool
+        with ProcessPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(max_workers=len(codes)) as threads:
+            futures = {
+                code: threads.submit(load_products, markets[code]["url"], 1, cache_dir, session, engine, pool)
+                for code in codes
+            }
+            for code, future in futures.items():
+                try:
+                    results[code] = future.result()
+                except Exception as e:
+                    errors[code] = str(e)
+    finally:
+        session.close()
+
+    index = {"generated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"), "markets": {}, "items": {}}
+    for code in codes:
+        market = markets[code]
+        if code in errors:
+            print(f"⚠️ {code}: {errors[code]}")
+            index["markets"][code] = {**market, "error": errors[code]}
+            continue
+
+        currency = market.get("currency", "HKD")
+        products = localize_prices(results[code], currency)
+        save_products(products, market["output"], currency, label=code)
+        record_history(products, code, currency, source=market["url"], db_path=history_db)
+
+        retail_key, member_key = price_keys(currency)
+        index["markets"][code] = {**market, "products": len(products)}
+        for p in products:
+            entry = index["items"].setdefault(p["itemNo"], {"name": p["name"], "markets": {}})
+            entry["markets"].setdefault(code, {"retail": p[retail_key], "member": p[member_key]})
+
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    print(f"Success! {len(results)}/{len(codes)} markets scraped, index written to {index_file}.")
+    return index
+
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Scrape the doTERRA HK price list into doterra_products.json")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="processes used to parse PDF pages (1 = serial)")
+    parser.add_argument("--url", default=PDF_URL, help="price-list PDF to fetch")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--engine", choices=ENGINES, default=ENGINE,
+                        help="text: regex over text lines, layout: columns from word positions")
+    parser.add_argument("--diff-engines", action="store_true",
+                        help=f"only parse with both engines and write a diff report to {DIFF_FILE}")
+    parser.add_argument("--markets", nargs="*", metavar="CODE",
+                        help=f"scrape markets from {MARKETS_FILE} in parallel (no codes = all)")
+    parser.add_argument("--markets-file", default=MARKETS_FILE)
+    parser.add_argument("--history-db", default=HISTORY_DB,
+                        help="SQLite price history to append to ('' to skip)")
+    parser.add_argument("--record-text", metavar="PATH",
+                        help="only save the PDF's page texts as a classifier benchmark corpus")
+    parser.add_argument("--no-pause", action="store_true",
+                        help="exit without waiting for Enter (also implied when stdin is not a terminal)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.record_text:
+            record_text(args.url, args.record_text, args.cache_dir)
+        elif args.diff_engines:
+            diff_engines(args.url, args.workers, args.cache_dir)
+        elif args.markets is not None:
+            run_markets(args.markets, args.markets_file, args.cache_dir, args.engine,
+                        workers=args.workers if args.workers > 1 else None, history_db=args.history_db)
+        else:
+            run_scraper(workers=args.workers, url=args.url, filename=args.output,
+                        cache_dir=args.cache_dir, engine=args.engine, history_db=args.history_db)
+    except Exception as e:
+        print(f"\nCRITICAL ERROR: {e}")
+    
+    # KEEPS THE WINDOW OPEN (the .exe build), never blocks scheduled / piped runs
+    if not args.no_pause and sys.stdin.isatty():
+        input("\nProcess Complete! Press Enter to close this window...")
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,217 @@
+import os
+import re
+import json
+import argparse
+import unicodedata
+from difflib import SequenceMatcher
+
+# Offline PIP link resolver: builds candidate URLs from a product name with the
+# slug templates doTERRA uses, and ranks them against a catalog of known-good
+# URLs with a trigram index. Entries it resolves skip the LLM "PIP prompt";
+# only the leftovers need it.
+
+PIP_FILE = "PIP.json"
+ENCYCLOPEDIA_FILE = "encyclopedia.json"
+CHECK_FILE = "PIP.check.json"        # from pip_verifier.py: drops known-broken URLs from the catalog
+BROKEN_FILE = "PIP.broken.json"      # default input when present
+RESOLVED_FILE = "PIP.resolved.json"  # same shape as PIP.json, ready for 3.merge_PIP.py --pip
+LEFTOVER_FILE = "PIP.leftover.json"  # what still needs the PIP prompt
+
+PIP_BASE = "https://media.doterra.com/us/en/pips/"
+TEMPLATES = (
+    "doterra-{slug}-essential-oil.pdf",
+    "doterra-{slug}-essential-oil-blend.pdf",
+    "doterra-{slug}-oil.pdf",
+    "doterra-{slug}.pdf",
+    "{slug}.pdf",
+)
+# Generic file-name parts that say nothing about which product it is
+STEM_NOISE_RE = re.compile(r'^doterra-|(-essential)?(-oil)?(-blend)?(-\d+-?ml)?$')
+NAME_NOISE_RE = re.compile(r'\b(roll[ -]?on|new)\b')
+THRESHOLD = 0.85  # minimum fuzzy score for an offline match
+BRAND_WEIGHT = 0.95  # "Rescuer® Soothing" -> "rescuer" is a slightly weaker match than the full name
+TOP_K = 10
+
+def slugify(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    text = text.replace("+", " plus ").replace("&", " and ")
+    return re.sub(r'[^a-z0-9]+', '-', text).strip('-')
+
+def compact(slug):
+    return slug.replace("-", "")
+
+def name_variants(name):
+    """[(slug, weight)] for a product name: as is, without the parenthetical,
+    and the trademark part alone ("Brave® Courage" -> "brave")."""
+    if not name: return []
+    name = NAME_NOISE_RE.sub(" ", name.lower())
+    variants = [(slugify(name), 1.0), (slugify(re.sub(r'\(.*?\)', ' ', name)), 1.0)]
+    brand = re.split(r'[®™]', name, maxsplit=1)
+    if len(brand) > 1:
+        variants.append((slugify(brand[0]), BRAND_WEIGHT))
+    seen, result = set(), []
+    for slug, weight in variants:
+        if slug and slug not in seen:
+            seen.add(slug)
+            result.append((slug, weight))
+    return result
+
+def candidate_urls(name):
+    """Template URLs for a name, most likely first (for --verify probing)."""
+    return [PIP_BASE + t.format(slug=slug) for t in TEMPLATES for slug, _ in name_variants(name)]
+
+def url_stem(url):
+    """"https://.../doterra-rose-touch-essential-oil-blend.pdf" -> "rose-touch"."""
+    file_name = url.rstrip("/").rsplit("/", 1)[-1].lower()
+    if file_name.endswith(".pdf"): file_name = file_name[:-4]
+    return STEM_NOISE_RE.sub("", file_name) or file_name
+
+def trigrams(text):
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class PipCatalog:
+    """Known-good PIP URLs, with the product names they belong to and a trigram index."""
+
+    def __init__(self):
+        self.urls = []
+        self.stems = []
+        self.owners = {}  # url -> set of name slugs
+        self.index = {}   # trigram -> set of url positions
+
+    def add(self, url, name=None):
+        if url not in self.owners:
+            self.owners[url] = set()
+            position = len(self.urls)
+            self.urls.append(url)
+            stem = compact(url_stem(url))
+            self.stems.append(stem)
+            for gram in trigrams(stem):
+                self.index.setdefault(gram, set()).add(position)
+        if name:
+            self.owners[url].add(compact(slugify(name)))
+
+    def owned_by_other(self, url, name):
+        owners = self.owners.get(url, set())
+        return bool(owners) and compact(slugify(name)) not in owners
+
+    def search(self, key, limit=TOP_K):
+        """[(score, url)] best first, for a compact slug."""
+        counts = {}
+        for gram in trigrams(key):
+            for position in self.index.get(gram, ()):
+                counts[position] = counts.get(position, 0) + 1
+        shortlist = sorted(counts, key=counts.get, reverse=True)[:limit]
+        return sorted(
+            ((SequenceMatcher(None, key, self.stems[p]).ratio(), self.urls[p]) for p in shortlist),
+            reverse=True
+        )
+
+    def resolve(self, name):
+        """(url, method, score) or (None, None, best score)."""
+        urls = set(self.owners)
+        for url in candidate_urls(name):
+            if url in urls and not self.owned_by_other(url, name):
+                return url, "template", 1.0
+
+        best = (0.0, None)
+        for slug, weight in name_variants(name):
+            for score, url in self.search(compact(slug)):
+                if self.owned_by_other(url, name):
+                    continue  # another product's page, however similar the name
+                if score * weight > best[0]:
+                    best = (score * weight, url)
+        if best[1] and best[0] >= THRESHOLD:
+            return best[1], "fuzzy", round(best[0], 3)
+        return None, None, round(best[0], 3)
+
+def load_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def build_catalog(pip_path=PIP_FILE, encyclopedia_path=ENCYCLOPEDIA_FILE, check_path=CHECK_FILE, extra=()):
+    """Catalog from every PIP URL already in the data, minus the ones pip_verifier.py found broken."""
+    bad = {
+        e["pip"] for e in load_json(check_path, [])
+        if e.get("pip") and e.get("check", {}).get("status") in ("broken", "timeout")
+    }
+    catalog = PipCatalog()
+    for e in load_json(pip_path, []):
+        if e.get("pip") and e["pip"] not in bad:
+            catalog.add(e["pip"], e.get("name"))
+    for e in load_json(encyclopedia_path, []):
+        url = isinstance(e, dict) and (e.get("references") or {}).get("PIP")
+        if url and url not in bad:
+            catalog.add(url, e.get("name"))
+    for url in extra:
+        if url not in bad:
+            catalog.add(url)
+    return catalog, bad
+
+def resolve_pip(input_path=None, output_path=RESOLVED_FILE, leftover_path=LEFTOVER_FILE,
+                pip_path=PIP_FILE, encyclopedia_path=ENCYCLOPEDIA_FILE, check_path=CHECK_FILE,
+                catalog_files=(), verify=False):
+    extra = [url for path in catalog_files for url in load_json(path, [])]
+    catalog, bad = build_catalog(pip_path, encyclopedia_path, check_path, extra)
+
+    # Default input: the verifier's broken list, else every entry without a usable link
+    if input_path is None:
+        input_path = BROKEN_FILE if os.path.exists(BROKEN_FILE) else pip_path
+    entries = load_json(input_path, [])
+    if input_path == pip_path:
+        entries = [e for e in entries if not e.get("pip") or e["pip"] in bad]
+
+    resolved, leftovers = [], []
+    for entry in entries:
+        url, method, score = catalog.resolve(entry.get("name"))
+        if url:
+            resolved.append({"id": entry["id"], "name": entry.get("name"), "pip": url,
+                             "match": {"method": method, "score": score}})
+        else:
+            leftovers.append(entry)
+
+    # Optional network step: probe the template URLs of what is left
+    if verify and leftovers:
+        import asyncio
+        from pip_verifier import check_urls
+        probes = {e["id"]: [u for u in candidate_urls(e.get("name")) if u not in bad] for e in leftovers}
+        checked = asyncio.run(check_urls(sorted({u for urls in probes.values() for u in urls})))
+        still_left = []
+        for entry in leftovers:
+            hit = next((u for u in probes[entry["id"]] if checked[u]["status"] in ("ok", "redirect")), None)
+            if hit:
+                resolved.append({"id": entry["id"], "name": entry.get("name"),
+                                 "pip": checked[hit].get("final_url", hit), "match": {"method": "probe", "score": 1.0}})
+            else:
+                still_left.append(entry)
+        leftovers = still_left
+
+    for path, data in ((output_path, resolved), (leftover_path, leftovers)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    print("=" * 50)
+    print("PIP RESOLVER")
+    print("=" * 50)
+    print(f"Catalog URLs:     {len(catalog.urls)} ({len(bad)} known-broken excluded)")
+    print(f"Entries to fix:   {len(entries)} (from {input_path})")
+    for method in ("template", "fuzzy", "probe"):
+        print(f"Resolved ({method + '):':10} {sum(1 for r in resolved if r['match']['method'] == method)}")
+    print(f"Left for the PIP prompt: {len(leftovers)} -> {leftover_path}")
+    print(f"Merge with: python 3.merge_PIP.py --pip {output_path}")
+    print("=" * 50)
+    return resolved, leftovers
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve PIP links offline from product names")
+    parser.add_argument("--input", default=None,
+                        help=f"entries to resolve (default: {BROKEN_FILE} if present, else entries of {PIP_FILE} without a link)")
+    parser.add_argument("--output", default=RESOLVED_FILE)
+    parser.add_argument("--leftover", default=LEFTOVER_FILE)
+    parser.add_argument("--catalog", nargs="*", default=[], help="extra JSON lists of known-good PIP URLs")
+    parser.add_argument("--verify", action="store_true", help="probe template URLs of unresolved entries over HTTP")
+    args = parser.parse_args()
+
+    resolve_pip(args.input, args.output, args.leftover, catalog_files=args.catalog, verify=args.verify)
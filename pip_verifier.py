@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+import httpx  # pooled async HTTP client
+
+from oilupdater.ratelimit import RETRY_STATUSES, status_of, retry_async
+
+# PIP link verifier: checks every "pip" URL of PIP.json with HEAD (or a one-byte
+# range GET where HEAD is refused) over one pooled async client, with a per-host
+# concurrency limit and a TTL result cache. Only links classified "broken" or
+# "timeout" still need the LLM "PIP prompt" step before 3.merge_PIP.py.
+
+PIP_FILE = "PIP.json"
+REPORT_FILE = "PIP.check.json"    # per-entry status
+BROKEN_FILE = "PIP.broken.json"   # the subset to send through the PIP prompt
+CACHE_FILE = ".pip_check_cache.json"
+CACHE_TTL = 24 * 3600  # seconds a result is reused
+PER_HOST = 4           # requests in flight per host
+MAX_CONNECTIONS = 32
+TIMEOUT = 10.0
+RETRIES = 2            # for connection errors and 408/429/5xx
+
+STATUSES = ("ok", "redirect", "broken", "timeout")
+HEAD_REFUSED = {400, 403, 405, 501}  # servers that don't do HEAD: retry as a range GET
+
+def is_retryable(e):
+    if isinstance(e, httpx.TimeoutException):
+        return True
+    if isinstance(e, httpx.TransportError):
+        return True
+    return status_of(e) in RETRY_STATUSES
+
+def classify(response):
+    """Status of a finished request (redirects already followed)."""
+    if response.status_code >= 400:
+        return "broken"
+    if response.history:
+        return "redirect"
+    return "ok"
+
+async def fetch(client, url):
+    response = await client.head(url)
+    if response.status_code in HEAD_REFUSED:
+        async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as streamed:
+            response = streamed  # body is never read, only the status line and headers
+    if response.status_code in RETRY_STATUSES:
+        response.raise_for_status()
+    return response
+
+async def check_url(client, url, host_limits, per_host=PER_HOST, retries=RETRIES):
+    host = urlsplit(url).netloc
+    if host not in host_limits:
+        host_limits[host] = asyncio.Semaphore(per_host)
+    semaphore = host_limits[host]
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            response = await retry_async(lambda: fetch(client, url), is_retryable, retries, base=0.5, cap=5.0)
+        except httpx.TimeoutException:
+            return {"status": "timeout", "code": None, "error": "timed out"}
+        except Exception as e:
+            return {"status": "broken", "code": status_of(e), "error": str(e) or type(e).__name__}
+
+        result = {"status": classify(response), "code": response.status_code,
+                  "ms": round((time.perf_counter() - start) * 1000)}
+        if response.history:
+            result["final_url"] = str(response.url)
+        return result
+
+# ---------- CACHE ----------
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache, path=CACHE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+# ---------- RUN ----------
+
+async def check_urls(urls, per_host=PER_HOST, timeout=TIMEOUT, retries=RETRIES):
+    """{url: result} for every URL, checked concurrently."""
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    host_limits = {}
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True,
+                                 headers={"User-Agent": "OilUpdaterHK-pip-verifier"}) as client:
+        results = await asyncio.gather(*(check_url(client, url, host_limits, per_host, retries) for url in urls))
+    return dict(zip(urls, results))
+
+def verify_pip(pip_path=PIP_FILE, report_path=REPORT_FILE, broken_path=BROKEN_FILE,
+               cache_path=CACHE_FILE, ttl=CACHE_TTL, per_host=PER_HOST, timeout=TIMEOUT, refresh=False):
+    with open(pip_path, "r", encoding="utf-8") as f:
+        pip_list = json.load(f)
+
+    # 1. Unique URLs; fresh good results are reused, failures are always rechecked
+    cache = {} if refresh else load_cache(cache_path)
+    now = time.time()
+    urls = sorted({e["pip"] for e in pip_list if e.get("pip")})
+    stale = [
+        u for u in urls
+        if now - cache.get(u, {}).get("checked", 0) > ttl or cache[u].get("status") not in ("ok", "redirect")
+    ]
+
+    # 2. Check the rest concurrently
+    start = time.perf_counter()
+    if stale:
+        for url, result in asyncio.run(check_urls(stale, per_host, timeout)).items():
+            cache[url] = {**result, "checked": now}
+        save_cache({u: cache[u] for u in urls if u in cache}, cache_path)
+    elapsed = time.perf_counter() - start
+
+    # 3. Per-entry report + the broken subset for the PIP prompt
+    report, broken = [], []
+    counts = dict.fromkeys(STATUSES + ("missing",), 0)
+    for entry in pip_list:
+        url = entry.get("pip")
+        result = {k: v for k, v in cache[url].items() if k != "checked"} if url else {"status": "missing"}
+        counts[result["status"]] += 1
+        report.append({**entry, "check": result})
+        if result["status"] not in ("ok", "redirect"):
+            broken.append(entry)
+
+    for path, data in ((report_path, report), (broken_path, broken)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    print("=" * 50)
+    print("PIP LINK CHECK")
+    print("=" * 50)
+    print(f"Entries:            {len(pip_list)}")
+    print(f"Unique URLs:        {len(urls)} ({len(stale)} checked in {elapsed:.1f}s, {len(urls) - len(stale)} cached)")
+    for status in STATUSES + ("missing",):
+        print(f"{status.capitalize() + ':':19} {counts[status]}")
+    print(f"Needs the PIP prompt: {len(broken)} -> {broken_path}")
+    print("=" * 50)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the PIP links in PIP.json without an LLM")
+    parser.add_argument("--pip", default=PIP_FILE)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--broken", default=BROKEN_FILE)
+    parser.add_argument("--cache", default=CACHE_FILE)
+    parser.add_argument("--ttl-hours", type=float, default=CACHE_TTL / 3600)
+    parser.add_argument("--per-host", type=int, default=PER_HOST)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--refresh", action="store_true", help="ignore cached results")
+    args = parser.parse_args()
+
+    verify_pip(args.pip, args.report, args.broken, args.cache, args.ttl_hours * 3600,
+               args.per_host, args.timeout, args.refresh)
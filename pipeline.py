@@ -0,0 +1,6 @@
+# The orchestrator lives in oilupdater/pipeline.py; this script keeps
+# `python pipeline.py [options]` working (same as: python -m oilupdater run).
+from oilupdater.pipeline import cli
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,264 @@
+import json
+import argparse
+from math import comb
+from itertools import combinations
+
+import numpy as np  # pip install numpy
+
+from oilupdater.entry_schema import BENEFITS
+
+# Oil recommendation / blend scoring over the generalBenefits scores of
+# encyclopedia.json. The encyclopedia is loaded once into a dense score matrix
+# (products x BENEFITS) and price vectors, so a query is a few array
+# operations instead of a loop over nested dicts.
+
+ENCYCLOPEDIA_FILE = "encyclopedia.json"
+
+BENEFIT_INDEX = {b: i for i, b in enumerate(BENEFITS)}
+PRICE_FIELDS = ("member_hkd", "retail_hkd")
+BLEND_CATEGORIES = ("Single Oil", "Essential Oil Blends")
+BLEND_SIZE = 3
+BLEND_BUDGET = 250_000  # most blends scored at once; only beyond it are candidates cut (result then approximate)
+PER_BENEFIT = 3     # when the cut happens: the best few per target benefit always stay
+SCORE_MAX = 5       # target for a benefit named without a value
+
+
+def benefit_vector(benefits, default=1.0):
+    """{"sleep": 2, "stress": 1} or ["sleep", "stress"] -> float vector over BENEFITS."""
+    vector = np.zeros(len(BENEFITS), dtype=np.float32)
+    items = benefits.items() if isinstance(benefits, dict) else ((b, default) for b in benefits)
+    for benefit, value in items:
+        if benefit not in BENEFIT_INDEX:
+            raise ValueError(f"unknown benefit {benefit!r} (one of: {', '.join(BENEFITS)})")
+        vector[BENEFIT_INDEX[benefit]] = value
+    return vector
+
+
+class Recommender:
+    def __init__(self, entries):
+        rows = [e for e in entries if isinstance(e, dict) and isinstance(e.get("generalBenefits"), dict)]
+        self.item_nos = [e.get("itemNo") for e in rows]
+        self.names = [e.get("name") for e in rows]
+        self.categories = np.array([e.get("category") for e in rows], dtype=object)
+        # A missing score counts as 0: never recommended for that benefit
+        self.scores = np.array(
+            [[(e["generalBenefits"].get(b) or {}).get("score") or 0 for b in BENEFITS] for e in rows],
+            dtype=np.float32
+        ).reshape(len(rows), len(BENEFITS))
+        # Missing prices are NaN, which never passes a price limit
+        self.prices = {
+            field: np.array([(e.get("prices") or {}).get(field) or np.nan for e in rows], dtype=np.float64)
+            for field in PRICE_FIELDS
+        }
+        self._category_masks = {}
+        self._combinations = {}
+
+    @classmethod
+    def from_file(cls, path=ENCYCLOPEDIA_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.item_nos)
+
+    # ---------- FILTERS ----------
+
+    def category_mask(self, categories):
+        key = tuple(sorted(categories))
+        if key not in self._category_masks:
+            self._category_masks[key] = np.isin(self.categories, key)
+        return self._category_masks[key]
+
+    def mask(self, max_price=None, price="member_hkd", categories=None):
+        keep = np.ones(len(self), dtype=bool)
+        if categories:
+            keep &= self.category_mask(categories)
+        if max_price is not None:
+            keep &= self.prices[price] <= max_price
+        return keep
+
+    def combinations(self, n, size):
+        """Every size-subset of range(n) as `size` index columns, built once per shape.
+        Columns (not a 2-D array) because reducing over a short axis is slow in NumPy."""
+        if (n, size) not in self._combinations:
+            flat = np.fromiter((i for combo in combinations(range(n), size) for i in combo), dtype=np.intp)
+            self._combinations[(n, size)] = tuple(np.ascontiguousarray(c) for c in flat.reshape(-1, size).T)
+        return self._combinations[(n, size)]
+
+    # ---------- QUERIES ----------
+
+    def top_k(self, benefits, k=5, max_price=None, price="member_hkd", categories=None):
+        """Best products for weighted benefits: [{itemNo, name, score, price}], best first.
+        score is the weighted mean benefit score (1-5); ties go to the cheaper product."""
+        weights = benefit_vector(benefits)
+        if weights.sum() <= 0:
+            raise ValueError("at least one benefit needs a positive weight")
+        candidates = np.flatnonzero(self.mask(max_price, price, categories))
+        if not len(candidates):
+            return []
+
+        scores = self.scores[candidates] @ weights / weights.sum()
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((self.prices[price][candidates[top]], -scores[top]))]
+        return [self._row(candidates[i], score=round(float(scores[i]), 3), price=price) for i in top]
+
+    def best_blend(self, target, size=BLEND_SIZE, k=1, max_price=None, price="member_hkd",
+                   categories=BLEND_CATEGORIES, budget=BLEND_BUDGET):
+        """Best `size`-product blends for a target profile ({"sleep": 5, "stress": 4}).
+        A blend's profile is the best score of its members per benefit; blends are ranked
+        by the squared shortfall against the target, then by total price.
+        max_price applies to the whole blend. "exact" is False when more than `budget`
+        blends were left after pruning and the candidates had to be cut."""
+        target = benefit_vector(target, default=SCORE_MAX)
+        k = max(1, k)
+        active = target > 0
+        if not active.any():
+            raise ValueError("the target profile is empty")
+
+        candidates = np.flatnonzero(self.mask(None, price, categories))
+        if max_price is not None:
+            candidates = candidates[~(self.prices[price][candidates] > max_price)]  # NaN stays for now
+        if len(candidates) < size:
+            return []
+        pool_idx, exact = self.prune(candidates, target, active, price, limit=size + k - 1,
+                                     size=size, budget=budget)
+
+        # Every blend of the pool at once, one target benefit at a time (scores clipped at the target)
+        columns = self.combinations(len(pool_idx), size)
+        clipped = np.minimum(self.scores[pool_idx][:, active], target[active]).T
+        shortfall = np.zeros(len(columns[0]), dtype=np.float32)
+        for row, wanted in zip(clipped, target[active]):
+            best = row[columns[0]]
+            for column in columns[1:]:
+                np.maximum(best, row[column], out=best)
+            np.subtract(wanted, best, out=best)
+            shortfall += best * best
+        prices = self.prices[price][pool_idx]
+        total = prices[columns[0]]
+        for column in columns[1:]:
+            total = total + prices[column]
+
+        fits = np.flatnonzero(total <= max_price) if max_price is not None else np.arange(len(total))
+        if not len(fits):
+            return []
+        # Least shortfall first, then cheapest (NaN totals last)
+        scale = np.nan_to_num(total[fits], nan=0).max() + 1
+        key = shortfall[fits] * scale + np.nan_to_num(total[fits], nan=np.inf)
+        top = np.argpartition(key, k - 1)[:k] if k < len(key) else np.arange(len(key))
+        top = fits[top[np.argsort(key[top], kind="stable")]]
+
+        results = []
+        for j in top:
+            members = pool_idx[[column[j] for column in columns]]
+            best = self.scores[members].max(axis=0)
+            results.append({
+                "items": [self._row(i, price=price) for i in members],
+                "shortfall": round(float(shortfall[j]), 3),
+                "profile": {BENEFITS[b]: int(best[b]) for b in np.flatnonzero(active)},
+                "price": None if np.isnan(total[j]) else round(float(total[j]), 2),
+                "exact": exact,
+            })
+        return results
+
+    def prune(self, candidates, target, active, price, limit, size=BLEND_SIZE, budget=BLEND_BUDGET):
+        """Candidates that can be in one of the best blends, and whether that is exact.
+        Only scores up to the target matter, so products are compared on their
+        clipped profile. A product with `limit` others at least as good on every
+        target benefit and no more expensive can always be swapped for one of
+        them, so it is dropped. Only if the rest still makes more than `budget`
+        blends of `size` are the least relevant ones cut (the one inexact step)."""
+        clipped = np.minimum(self.scores[candidates][:, active], target[active]).T
+        cost = np.nan_to_num(self.prices[price][candidates], nan=np.inf)
+
+        # Same clipped profile: only the `limit` cheapest can matter (sort-based, O(n log n))
+        order = np.lexsort((cost, *clipped))
+        ordered = clipped[:, order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (ordered[:, 1:] != ordered[:, :-1]).any(axis=0)
+        rank = np.arange(len(order)) - np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+        survivors = np.sort(order[rank < limit])
+        clipped, cost = clipped[:, survivors], cost[survivors]
+
+        # dominates[a, b]: a is at least as good everywhere and no more expensive, with a
+        # strict tie-break on position so that equal products don't drop each other
+        at_least = cost[:, None] <= cost[None, :]
+        differs = cost[:, None] < cost[None, :]
+        for row in clipped:
+            at_least &= row[:, None] >= row[None, :]
+            differs |= row[:, None] != row[None, :]
+        differs |= np.tri(len(cost), k=-1, dtype=bool).T
+        keep = survivors[(at_least & differs).sum(axis=0) < limit]
+
+        if comb(len(keep), size) <= budget:
+            return candidates[keep], True
+
+        # Largest relevance cut that, with the extras below, still fits the budget
+        extra = PER_BENEFIT * int(active.sum()) + size
+        pool = 0
+        while comb(pool + 1 + extra, size) <= budget:
+            pool += 1
+        scores = self.scores[candidates[keep]]
+        relevance = scores @ (target / target.sum())
+        trimmed = set(np.argsort(-relevance, kind="stable")[:pool].tolist())
+        for b in np.flatnonzero(active):
+            trimmed.update(np.argsort(-scores[:, b], kind="stable")[:PER_BENEFIT].tolist())
+        # and the cheapest few, so a blend under the price limit survives whenever one exists
+        trimmed.update(np.argsort(cost[np.searchsorted(survivors, keep)], kind="stable")[:size].tolist())
+        keep = keep[np.array(sorted(trimmed), dtype=np.intp)]
+        return candidates[keep], False
+
+    def _row(self, i, price="member_hkd", **extra):
+        value = self.prices[price][i]
+        return {"itemNo": self.item_nos[i], "name": self.names[i], **extra,
+                "price": None if np.isnan(value) else float(value)}
+
+
+def parse_benefits(args):
+    """["sleep=2", "stress"] -> {"sleep": 2.0, "stress": None}"""
+    parsed = {}
+    for arg in args:
+        name, _, value = arg.partition("=")
+        parsed[name.strip()] = float(value) if value else None
+    return parsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recommend products or blends from encyclopedia.json benefit scores")
+    parser.add_argument("benefits", nargs="+",
+                        help="benefit[=value]: a weight (default 1), or with --blend a target score (default 5)")
+    parser.add_argument("--blend", action="store_true", help="best blend instead of single products")
+    parser.add_argument("--size", type=int, default=BLEND_SIZE, help="products per blend")
+    parser.add_argument("-k", type=int, default=None, help="results to show (default: 5 products / 1 blend)")
+    parser.add_argument("--max-price", type=float, default=None, help="HKD, per product (per blend with --blend)")
+    parser.add_argument("--retail", action="store_true", help="use retail instead of member prices")
+    parser.add_argument("--category", nargs="*", default=None,
+                        help=f"limit to these categories (blends default to: {', '.join(BLEND_CATEGORIES)})")
+    parser.add_argument("--encyclopedia", default=ENCYCLOPEDIA_FILE)
+    args = parser.parse_args()
+
+    engine = Recommender.from_file(args.encyclopedia)
+    price = "retail_hkd" if args.retail else "member_hkd"
+    wanted = parse_benefits(args.benefits)
+    unknown = [b for b in wanted if b not in BENEFIT_INDEX]
+    if unknown:
+        parser.error(f"unknown benefit(s) {', '.join(unknown)} (one of: {', '.join(BENEFITS)})")
+
+    if args.blend:
+        target = {b: SCORE_MAX if v is None else v for b, v in wanted.items()}
+        categories = BLEND_CATEGORIES if args.category is None else args.category
+        blends = engine.best_blend(target, args.size, args.k or 1, args.max_price, price, categories)
+        for blend in blends:
+            print(f"shortfall {blend['shortfall']:<6} HKD {blend['price']}  profile {blend['profile']}"
+                  + ("" if blend["exact"] else "  (approximate: too many candidates to score every blend)"))
+            for item in blend["items"]:
+                print(f"    {item['itemNo']}  {item['name']}  (HKD {item['price']})")
+        if not blends:
+            print("No blend matches.")
+    else:
+        weights = {b: 1.0 if v is None else v for b, v in wanted.items()}
+        results = engine.top_k(weights, args.k or 5, args.max_price, price, args.category)
+        for row in results:
+            print(f"{row['score']:<6} {row['itemNo']}  {row['name']}  (HKD {row['price']})")
+        if not results:
+            print("No product matches.")